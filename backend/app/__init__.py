@@ -1,3 +1,10 @@
-from .main import app
-
 __all__ = ["app"]
+
+
+def __getattr__(name):
+    # `from app import app` keeps working, but importing a submodule (app.db,
+    # app.services.*) no longer drags in the whole FastAPI application
+    if name == "app":
+        from .main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,25 +1,33 @@
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 
-from .db import init_db
-from .routers import auth, projects, sections
+from .db import engine, init_db
+from .routers import admin, auth, projects, search, sections
+from .services.metrics import metrics
+from .services.llm_executor import llm_executor
+from .services.render_pool import render_pool
+from .services.retention import revision_retention
+from .services.search_index import search_index
+from .services.warmup import WARMUP_ON_STARTUP, warmup
+from .utils.profiler import request_profiler
+from .utils.static_assets import StaticManifest
+from .utils.timing import ServerTimingMiddleware, TimedJSONResponse, install_db_timing
 
 app = FastAPI(
     title="AI Document Builder",
     version="1.0.0",
+    default_response_class=TimedJSONResponse,
 )
 
 FRONTEND_DIST = Path(__file__).resolve().parent / "static"
 
-if FRONTEND_DIST.exists():
-    assets_dir = FRONTEND_DIST / "assets"
-    if assets_dir.exists():
-        # Serve built frontend assets when available (e.g., inside the Docker image)
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+# Built frontend (e.g., inside the Docker image), indexed once so requests never stat the disk
+STATIC_MANIFEST = StaticManifest.scan(FRONTEND_DIST)
 
 # ---- CORS (allow frontend access) ----
 app.add_middleware(
@@ -28,40 +36,78 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id", "Idempotent-Replayed", "Retry-After", "X-Next-Cursor"],
+)
+
+# ---- Per-request timing (Server-Timing header) + optional sampling profiler ----
+install_db_timing(engine)
+app.add_middleware(
+    ServerTimingMiddleware,
+    on_start=request_profiler.on_start,
+    on_finish=request_profiler.on_finish,
 )
 
 # ---- Initialize database ----
 @app.on_event("startup")
 def startup_event():
+    revision_retention.prepare()
     init_db()
+    search_index.install(engine)
+    revision_retention.start()
+    # templates, workflow and LLM client load in the background; see /ready
+    if WARMUP_ON_STARTUP:
+        warmup.start()
+    else:
+        warmup.ready.set()
 
 
-# ---- Root health endpoint ----
-@app.get("/")
-def root():
-    index_path = FRONTEND_DIST / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
-    return {"message": "Backend is running ✅"}
-
+@app.on_event("shutdown")
+def shutdown_event():
+    render_pool.shutdown()
+    llm_executor.shutdown()
+    revision_retention.stop()
 
-@app.get("/{path:path}", include_in_schema=False)
-def spa_fallback(path: str):
-    if not FRONTEND_DIST.exists():
-        raise HTTPException(status_code=404, detail="Not Found")
 
-    direct_file = FRONTEND_DIST / path
-    if direct_file.is_file():
-        return FileResponse(direct_file)
+# ---- In-process metrics ----
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
 
-    index_path = FRONTEND_DIST / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
 
-    raise HTTPException(status_code=404, detail="Not Found")
+# ---- Readiness probe ----
+@app.get("/ready")
+def get_ready():
+    """
+    200 once background warm-up has finished, 503 while it is still running.
+    """
+    snapshot = warmup.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
 
 
 # ---- Register routers ----
+# (before the SPA catch-all below, otherwise it shadows every API GET route)
 app.include_router(auth.router)
 app.include_router(projects.router)
 app.include_router(sections.router)
+app.include_router(search.router)
+app.include_router(admin.router)
+
+
+# ---- Root health endpoint ----
+@app.get("/")
+def root(accept_encoding: Optional[str] = Header(None), if_none_match: Optional[str] = Header(None)):
+    if STATIC_MANIFEST.index is not None:
+        return STATIC_MANIFEST.index.response(accept_encoding, if_none_match)
+    return {"message": "Backend is running ✅"}
+
+
+@app.get("/{path:path}", include_in_schema=False)
+def spa_fallback(path: str, accept_encoding: Optional[str] = Header(None), if_none_match: Optional[str] = Header(None)):
+    asset = STATIC_MANIFEST.get(path)
+    if asset is not None:
+        return asset.response(accept_encoding, if_none_match)
+
+    # unknown paths under /assets are real 404s, everything else is client-side routing
+    if STATIC_MANIFEST.index is None or path.startswith("assets/"):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return STATIC_MANIFEST.index.response(accept_encoding, if_none_match)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, Text
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,10 @@ from ..db import Base
 
 class Revision(Base):
     __tablename__ = "revisions"
+    __table_args__ = (
+        # per-section history lookups and retention scans
+        Index("ix_revisions_section_version", "section_id", "version"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     section_id = Column(Integer, ForeignKey("sections.id"), nullable=False)
@@ -0,0 +1,84 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from ..models.user import User
+from ..services.retention import revision_retention
+from ..utils.profiler import profile_window, request_profiler
+from .auth import get_current_user
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# Comma-separated list of emails allowed to use the admin endpoints
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+
+class RequestProfilingIn(BaseModel):
+    enabled: bool
+    sample_rate: float = 1.0
+    path_prefix: Optional[str] = None   # e.g. "/sections/" to only profile refines
+
+
+def _folded_response(folded: str, filename: str) -> PlainTextResponse:
+    return PlainTextResponse(folded, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.post("/profiler/requests")
+def configure_request_profiling(payload: RequestProfilingIn, admin: User = Depends(require_admin)):
+    """
+    Turn per-request sampling profiles on/off. Profiled responses carry an X-Profile-Id header.
+    """
+    request_profiler.configure(payload.enabled, payload.sample_rate, payload.path_prefix)
+    return {"enabled": request_profiler.enabled, "sample_rate": request_profiler.sample_rate,
+            "path_prefix": request_profiler.path_prefix}
+
+
+@router.get("/profiler/requests")
+def list_request_profiles(admin: User = Depends(require_admin)):
+    return [
+        {k: v for k, v in profile.items() if k != "folded"}
+        for profile in reversed(request_profiler.profiles.values())
+    ]
+
+
+@router.get("/profiler/requests/{profile_id}")
+def download_request_profile(profile_id: str, admin: User = Depends(require_admin)):
+    """
+    Folded stacks of one request (flamegraph.pl / speedscope compatible).
+    """
+    profile = request_profiler.profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _folded_response(profile["folded"], f"request-{profile_id}.folded")
+
+
+@router.post("/profiler/window")
+async def profile_time_window(seconds: float = Query(10.0, gt=0, le=120), admin: User = Depends(require_admin)):
+    """
+    Sample every thread for `seconds` and return the folded stacks.
+    """
+    folded = await run_in_threadpool(profile_window, seconds)
+    return _folded_response(folded, f"window-{int(seconds)}s.folded")
+
+
+@router.get("/retention")
+def retention_status(admin: User = Depends(require_admin)):
+    return revision_retention.snapshot()
+
+
+@router.post("/retention/run")
+async def run_retention(admin: User = Depends(require_admin)):
+    """
+    Run a revision retention pass now (normally every REVISION_RETENTION_INTERVAL_SECONDS).
+    """
+    return await run_in_threadpool(revision_retention.run_once)
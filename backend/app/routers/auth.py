@@ -7,6 +7,7 @@ from ..models.user import User
 from ..schemas.auth import TokenResponse, UserCreate, UserLogin, UserResponse
 from ..services.auth_service import create_user, verify_password
 from ..utils.jwt_utils import create_access_token, verify_access_token
+from ..utils.timing import timed
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -17,14 +18,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     """
     Dependency to get current user from the Authorization: Bearer <token> header.
     """
-    payload = verify_access_token(token)
-    user_id = payload.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+    with timed("auth"):
+        payload = verify_access_token(token)
+        user_id = payload.get("user_id")
+        if not user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
 
 
@@ -1,25 +1,53 @@
+import asyncio
+import base64
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+from sqlalchemy import String, func, literal, select, tuple_
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..db import SessionLocal, get_db
 from ..models.project import Project
 from ..models.revision import Revision
 from ..models.section import Section
 from ..models.user import User
-from ..services.export_service import export_to_docx, export_to_pptx
+from ..services.bulk_export import iter_bulk_export_zip
+from ..services.eval_batcher import evaluation_batcher
+from ..services.export_cache import export_cache, section_fingerprint
+from ..services.export_service import MEDIA_TYPES, STREAM_WRITERS, STREAMING_MEDIA_TYPES, export_filename, timestamp
+from ..services.idempotency import run_idempotent
+from ..services.llm_scheduler import Priority, llm_context
+from ..services.llm_service import build_project_context
+from ..services.progress import progress_broker, publish_section
+from ..services.render_pool import RenderQueueFull, RenderTimeout, RenderWorkerLost, render_pool
+from ..utils.cancellation import iterate_cancellable, run_cancellable
+from ..utils.http_cache import REVALIDATE, attachment_header, etag_matches, weak_etag
 from ..utils.jwt_utils import verify_access_token
-from ..workflows.graph import DEFAULT_GRAPH_CONFIG, graph
+from ..utils.timing import timed
+from ..workflows.graph import DEFAULT_GRAPH_CONFIG, get_graph
 from ..workflows.state import SectionState
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Sections of one project generated at the same time
+PROJECT_GENERATE_CONCURRENCY = int(os.getenv("PROJECT_GENERATE_CONCURRENCY", "4"))
+# Projects per page of GET /projects/my, and the largest page a client may ask for
+PROJECTS_PAGE_SIZE = int(os.getenv("PROJECTS_PAGE_SIZE", "50"))
+PROJECTS_MAX_PAGE_SIZE = int(os.getenv("PROJECTS_MAX_PAGE_SIZE", "200"))
+# Seconds between keep-alive pings on an idle progress WebSocket
+PROGRESS_PING_SECONDS = float(os.getenv("PROGRESS_PING_SECONDS", "25"))
+
 
 # ---- simple request bodies (replace with your schemas if available) ----
 class ProjectCreate(BaseModel):
@@ -31,16 +59,22 @@ class OutlineIn(BaseModel):
     sections: List[str]
 
 
+class BulkExportIn(BaseModel):
+    project_ids: Optional[List[int]] = None   # omit to export every project of the user
+    formats: List[str] = ["docx", "pptx"]
+
+
 # ---- helper to get current user (same logic as auth router) ----
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     from ..models.user import User as UserModel
-    payload = verify_access_token(token)
-    user_id = payload.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    with timed("auth"):
+        payload = verify_access_token(token)
+        user_id = payload.get("user_id")
+        if not user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        user = db.query(UserModel).filter(UserModel.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
 
 
@@ -60,25 +94,157 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db), curren
     return {"id": project.id, "title": project.title, "doc_type": project.doc_type, "created_at": project.created_at}
 
 
+def _encode_cursor(created_at, project_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(sep=" "), project_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(project_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _created_at_param(value: datetime):
+    # Compare with the timestamp as the database wrote it: SQLite keeps CURRENT_TIMESTAMP
+    # text without microseconds, while a bound datetime would carry ".000000" and break ties.
+    text_value = value.isoformat(sep=" ", timespec="microseconds" if value.microsecond else "seconds")
+    return literal(text_value, String)
+
+
 @router.get("/my", response_model=List[dict])
-def list_my_projects(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def list_my_projects(
+    response: Response,
+    limit: int = Query(PROJECTS_PAGE_SIZE, ge=1, le=PROJECTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     """
-    List projects for the logged in user.
+    List projects for the logged in user, newest first, `limit` per page.
+    Each entry has section counts by status and when the project last changed
+    (latest revision). The next page is requested with ?cursor=<X-Next-Cursor>;
+    the header is absent on the last page.
     """
-    projects = db.query(Project).filter(Project.owner_id == current_user.id).order_by(Project.created_at.desc()).all()
-    out = []
-    for p in projects:
-        out.append({"id": p.id, "title": p.title, "doc_type": p.doc_type, "created_at": p.created_at})
+    page = select(Project.id, Project.title, Project.doc_type, Project.created_at).where(
+        Project.owner_id == current_user.id
+    )
+    if cursor:
+        created_at, project_id = _decode_cursor(cursor)
+        page = page.where(tuple_(Project.created_at, Project.id) < tuple_(_created_at_param(created_at), project_id))
+    page = page.order_by(Project.created_at.desc(), Project.id.desc()).limit(limit + 1).subquery()
+
+    # one statement: the page of projects, outer-joined to per-status section counts
+    last_revision = (
+        select(Revision.section_id, func.max(Revision.created_at).label("last"))
+        .where(Revision.section_id.in_(select(Section.id).where(Section.project_id.in_(select(page.c.id)))))
+        .group_by(Revision.section_id)
+        .subquery()
+    )
+    counts = (
+        select(
+            Section.project_id,
+            Section.status,
+            func.count().label("n"),
+            func.max(func.coalesce(last_revision.c.last, Section.created_at)).label("last"),
+        )
+        .outerjoin(last_revision, last_revision.c.section_id == Section.id)
+        .where(Section.project_id.in_(select(page.c.id)))
+        .group_by(Section.project_id, Section.status)
+        .subquery()
+    )
+    rows = db.execute(
+        select(page, counts.c.status, counts.c.n, counts.c.last)
+        .outerjoin(counts, counts.c.project_id == page.c.id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    ).all()
+
+    projects = {}
+    for row in rows:
+        entry = projects.get(row.id)
+        if entry is None:
+            entry = projects[row.id] = {
+                "id": row.id, "title": row.title, "doc_type": row.doc_type, "created_at": row.created_at,
+                "section_count": 0, "sections_by_status": {}, "last_modified": row.created_at,
+            }
+        if row.status is not None:
+            entry["section_count"] += row.n
+            entry["sections_by_status"][row.status] = row.n
+            if row.last is not None and row.last > entry["last_modified"]:
+                entry["last_modified"] = row.last
+
+    out = list(projects.values())
+    if len(out) > limit:
+        out = out[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(out[-1]["created_at"], out[-1]["id"])
     return out
 
 
+@router.post("/export")
+def bulk_export(payload: BulkExportIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Export several projects (default: all of the user's projects) in one or more formats.
+    Files are rendered concurrently and streamed into a ZIP as each one finishes.
+    """
+    formats = list(dict.fromkeys(f.lower() for f in payload.formats))
+    if not formats or any(f not in MEDIA_TYPES for f in formats):
+        raise HTTPException(status_code=400, detail="formats must be a non-empty list of 'docx' / 'pptx'")
+
+    query = db.query(Project.id).filter(Project.owner_id == current_user.id)
+    if payload.project_ids is not None:
+        query = query.filter(Project.id.in_(payload.project_ids))
+    owned_ids = [row.id for row in query.order_by(Project.created_at.desc(), Project.id.desc()).all()]
+
+    if payload.project_ids is not None:
+        missing = sorted(set(payload.project_ids) - set(owned_ids))
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Projects not found: {missing}")
+    if not owned_ids:
+        raise HTTPException(status_code=400, detail="No projects to export")
+
+    filename = f"projects_{timestamp()}.zip"
+    return StreamingResponse(
+        iter_bulk_export_zip(owned_ids, formats),
+        media_type="application/zip",
+        headers={"Content-Disposition": attachment_header(filename)},
+    )
+
+
+def _section_summaries(db: Session, project_id: int):
+    # Everything the project ETag depends on, without touching the content column.
+    return (
+        db.query(Section.id, Section.title, Section.version, Section.status)
+        .filter(Section.project_id == project_id)
+        .order_by(Section.id)
+        .all()
+    )
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+
 @router.get("/{project_id}")
-def get_project(project_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_project(
+    project_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     project = db.query(Project).filter(Project.id == project_id, Project.owner_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     # include sections
-    sections = db.query(Section).filter(Section.project_id == project.id).order_by(Section.id).all()
+    sections = _section_summaries(db, project.id)
+    etag = weak_etag(["project", project.id, project.title, project.doc_type, [list(s) for s in sections]])
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
     sections_list = [{"id": s.id, "title": s.title, "version": s.version, "status": s.status} for s in sections]
     return {"id": project.id, "title": project.title, "doc_type": project.doc_type, "sections": sections_list, "created_at": project.created_at}
 
@@ -121,21 +287,63 @@ def submit_outline(project_id: int, payload: OutlineIn, db: Session = Depends(ge
 
 
 @router.get("/{project_id}/sections")
-def list_sections(project_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def list_sections(
+    project_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     project = db.query(Project).filter(Project.id == project_id, Project.owner_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+
+    # content only changes together with version/status, so the summary is enough for the ETag
+    etag = weak_etag(["sections", project_id, [list(s) for s in _section_summaries(db, project_id)]])
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
     sections = db.query(Section).filter(Section.project_id == project_id).order_by(Section.id).all()
     return [{"id": s.id, "title": s.title, "content": s.content, "version": s.version, "status": s.status} for s in sections]
 
 
 @router.post("/{project_id}/generate")
-def generate_project_content(project_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def generate_project_content(
+    project_id: int,
+    request: Request,
+    response: Response,
+    stream: bool = False,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     """
     Generate document content for all sections using LangGraph + Gemini.
     Loops through sections where status != 'generated' and invokes the graph for each.
     Saves content and creates a Revision entry.
+    A client disconnect stops the loop; sections finished before it stay saved.
+    Repeats with the same Idempotency-Key get the first run's response (or wait for it).
+    With ?stream=true the response is NDJSON: one record per section, written
+    as soon as it is committed (completion order), then a final "done" record.
     """
+    if stream:
+        if idempotency_key:
+            raise HTTPException(status_code=400, detail="Idempotency-Key is not supported with stream=true")
+        _generation_targets(project_id, db, current_user)   # 404 / 400 before the stream starts
+        records = iterate_cancellable("generate_project", _stream_project_content, project_id, current_user.id)
+        return StreamingResponse(_ndjson(records), media_type="application/x-ndjson",
+                                 headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"})
+
+    with llm_context(current_user.id, Priority.BULK):
+        if idempotency_key:
+            return await run_idempotent(request, response, idempotency_key, current_user.id, b"",
+                                        _generate_project_content, project_id, db, current_user)
+        return await run_cancellable(request, "generate_project", _generate_project_content, project_id, db, current_user)
+
+
+def _generation_targets(project_id: int, db: Session, current_user: User):
     project = db.query(Project).filter(Project.id == project_id, Project.owner_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -143,62 +351,249 @@ def generate_project_content(project_id: int, db: Session = Depends(get_db), cur
     sections = db.query(Section).filter(Section.project_id == project_id).order_by(Section.id).all()
     if not sections:
         raise HTTPException(status_code=400, detail="No sections found to generate")
+    return project, sections
+
 
-    generated = {}
+def _generate_project_content(project_id: int, db: Session, current_user: User):
+    project, sections = _generation_targets(project_id, db, current_user)
+
+    contents = {}
+
+    def collect(record):
+        if record["status"] == "generated":
+            contents[record["section_id"]] = record["content"]
+
+    errors = _generate_sections(project, sections, db, collect)
+    if errors:
+        raise errors[0]
+    generated = {sec.title: contents[sec.id] for sec in sections}
+    return {"generated": generated}
+
+
+def _stream_project_content(emit, project_id: int, user_id: int):
+    # Own session: the request-scoped one is closed once the streaming response starts.
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        project, sections = _generation_targets(project_id, db, user)
+        with llm_context(user_id, Priority.BULK):
+            errors = _generate_sections(project, sections, db, lambda record: emit({"type": "section", **record}))
+        emit({"type": "done", "generated": len(sections) - len(errors), "failed": len(errors)})
+    except HTTPException as exc:
+        emit({"type": "error", "detail": exc.detail})
+    finally:
+        db.close()
+
+
+async def _ndjson(records):
+    async for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+def _generate_sections(project: Project, sections: List[Section], db: Session, on_section) -> list:
+    """
+    Run every section's workflow and save each result as soon as it finishes.
+    `on_section` gets one record per section, in completion order, after its
+    commit (or its failure). Returns the exceptions of failed sections.
+    """
+    project_context = build_project_context(project.title, [s.title for s in sections])
+    states = {}
     for sec in sections:
         # create state for the graph
-        state = SectionState(
+        states[sec.id] = SectionState(
             section_id=sec.id,
             section_title=sec.title,
             doc_type=project.doc_type,
             content=sec.content,
-            context_summary=f"Project: {project.title}"
+            project_id=project.id,
+            project_context=project_context,
+            batch_evaluation=True,
+            report_progress=True,
+            # regenerating an existing section must not reuse its version number
+            version=sec.version + 1 if sec.content else sec.version,
         )
 
-        result = graph.invoke(state, config=DEFAULT_GRAPH_CONFIG)
-        # langgraph returns dict by default in your setup; handle both
-        if isinstance(result, dict):
-            final_content = result.get("content")
-            version = result.get("version", sec.version)
-            score = result.get("score")
-        else:
-            # pydantic object
-            final_content = result.content
-            version = result.version
-            score = result.score
-
-        # save
-        sec.content = final_content
-        sec.version = version
-        sec.status = "generated"
-        db.add(sec)
-
-        # create revision record
-        rev = Revision(section_id=sec.id, version=version, content=final_content, score=score)
-        db.add(rev)
-        db.commit()
-        db.refresh(sec)
-
-        generated[sec.title] = final_content
-
-    return {"generated": generated}
+    # Section workflows run concurrently (their evaluate steps get batched);
+    # each finished section is saved right away, in the calling thread.
+    by_id = {sec.id: sec for sec in sections}
+    errors = []
+    progress_broker.publish(project.id, "generation_started",
+                            sections=[{"section_id": sec.id, "title": sec.title} for sec in sections])
+    with ThreadPoolExecutor(max_workers=PROJECT_GENERATE_CONCURRENCY, thread_name_prefix="project-generate") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _run_section_graph, state): section_id
+            for section_id, state in states.items()
+        }
+        for future in as_completed(futures):
+            sec = by_id[futures[future]]
+            try:
+                result = future.result()
+            except Exception as exc:
+                # keep saving the sections that do finish; the caller reports failures
+                errors.append(exc)
+                error = exc.detail if isinstance(exc, HTTPException) else type(exc).__name__
+                progress_broker.publish(project.id, "section_failed", section_id=sec.id, error=error)
+                on_section({"section_id": sec.id, "title": sec.title, "status": "failed", "error": error})
+                continue
+            # langgraph returns dict by default in your setup; handle both
+            if isinstance(result, dict):
+                final_content = result.get("content")
+                version = result.get("version", states[sec.id].version)
+                score = result.get("score")
+            else:
+                # pydantic object
+                final_content = result.content
+                version = result.version
+                score = result.score
+
+            # save
+            sec.content = final_content
+            sec.version = version
+            sec.status = "generated"
+            db.add(sec)
+
+            # create revision record
+            rev = Revision(section_id=sec.id, version=version, content=final_content, score=score)
+            db.add(rev)
+            db.commit()
+
+            progress_broker.publish(project.id, "section_committed", section_id=sec.id, title=sec.title,
+                                    version=version, score=score, content=final_content)
+            on_section({"section_id": sec.id, "title": sec.title, "status": "generated",
+                        "version": version, "score": score, "content": final_content})
+
+    progress_broker.publish(project.id, "generation_finished", generated=len(sections) - len(errors), failed=len(errors))
+    return errors
+
+
+def _run_section_graph(state: SectionState):
+    publish_section(state, "section_started", title=state.section_title)
+    with evaluation_batcher.participant():
+        return get_graph().invoke(state, config=DEFAULT_GRAPH_CONFIG)
+
+
+def _owns_project(token: Optional[str], project_id: int) -> bool:
+    if not token:
+        return False
+    db = SessionLocal()
+    try:
+        user = get_current_user(token, db)
+        return db.query(Project.id).filter(Project.id == project_id, Project.owner_id == user.id).first() is not None
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+@router.websocket("/{project_id}/progress")
+async def project_progress(websocket: WebSocket, project_id: int, token: Optional[str] = None):
+    """
+    Live generation events of a project, as JSON messages: generation_started,
+    section_started, node_entered (generate / evaluate / refine), score,
+    section_committed (with content), section_failed, generation_finished.
+    Events of the current run are replayed on connect; `seq` orders them.
+    Browsers cannot set headers on a WebSocket, so the access token goes in ?token=.
+    """
+    if not await run_in_threadpool(_owns_project, token, project_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    with progress_broker.subscribe(project_id) as subscription:
+        for event in subscription.replay:
+            await websocket.send_json(event)
+        # client messages are ignored; reading them is how a disconnect shows up
+        receiver = asyncio.ensure_future(websocket.receive())
+        getter = asyncio.ensure_future(subscription.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({receiver, getter}, timeout=PROGRESS_PING_SECONDS,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    if receiver.result()["type"] == "websocket.disconnect":
+                        return
+                    receiver = asyncio.ensure_future(websocket.receive())
+                if getter in done:
+                    await websocket.send_json(getter.result())
+                    getter = asyncio.ensure_future(subscription.get())
+                elif not done:
+                    await websocket.send_json({"type": "ping"})
+        finally:
+            receiver.cancel()
+            getter.cancel()
+
+
+def _iter_section_rows(project_id: int, batch_size: int = 50):
+    # Own session: the request-scoped one may already be closed while the response streams.
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(Section.title, Section.content)
+            .filter(Section.project_id == project_id)
+            .order_by(Section.id)
+            .yield_per(batch_size)
+        )
+        for row in query:
+            yield row.title, row.content or ""
+    finally:
+        db.close()
+
+
+def _stream_text_export(project: Project, fmt: str, etag: str):
+    # Markdown/HTML are cheap to produce: stream them straight from the DB instead of caching.
+    writer = STREAM_WRITERS[fmt]
+    chunks = (piece.encode("utf-8") for piece in writer(project.title, _iter_section_rows(project.id)))
+    return StreamingResponse(
+        chunks,
+        media_type=STREAMING_MEDIA_TYPES[fmt],
+        headers={
+            "ETag": etag,
+            "Content-Disposition": attachment_header(export_filename(project.title, fmt)),
+        },
+    )
 
 
 @router.get("/{project_id}/export")
-def export_project(project_id: int, type: Optional[str] = Query("docx", regex="^(docx|pptx)$"), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def export_project(
+    project_id: int,
+    type: Optional[str] = Query("docx", regex="^(docx|pptx|md|html)$"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     """
-    Export the project to DOCX or PPTX and return file path (FileResponse).
+    Export the project to DOCX, PPTX, Markdown or HTML and return the file.
+    DOCX/PPTX renders are cached until a section of the project changes; the response
+    carries a strong ETag so unchanged downloads can be revalidated with If-None-Match.
+    Markdown/HTML are streamed section by section as they are read from the database.
     """
     project = db.query(Project).filter(Project.id == project_id, Project.owner_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    sections = db.query(Section).filter(Section.project_id == project_id).order_by(Section.id).all()
-    content_map = {s.title: s.content or "" for s in sections}
-
-    if type == "docx":
-        path = export_to_docx(project.title, content_map)
-    else:
-        path = export_to_pptx(project.title, content_map)
-
-    return FileResponse(path, filename=path.split("/")[-1])
+    if type in STREAM_WRITERS:
+        # same id/title/version/status summary as the project and section ETags
+        etag = weak_etag(["export", type, project.id, project.title, [list(s) for s in _section_summaries(db, project.id)]])
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return _stream_text_export(project, type, etag)
+
+    fingerprint = section_fingerprint(db, project)
+    cached = export_cache.get(project.id, type, fingerprint)
+    if cached is None:
+        sections = db.query(Section.title, Section.content).filter(Section.project_id == project_id).order_by(Section.id).all()
+        content_map = {s.title: s.content or "" for s in sections}
+        try:
+            body = render_pool.render(type, project.title, content_map, template=project.doc_type)
+        except RenderQueueFull:
+            raise HTTPException(status_code=503, detail="Export queue is full — try again shortly.", headers={"Retry-After": "5"})
+        except RenderWorkerLost:
+            raise HTTPException(status_code=503, detail="Export worker restarted — try again shortly.", headers={"Retry-After": "1"})
+        except RenderTimeout:
+            raise HTTPException(status_code=504, detail="Export rendering timed out")
+        cached = export_cache.put(project.id, type, fingerprint, export_filename(project.title, type), body)
+
+    headers = {"ETag": cached.etag, "Content-Disposition": attachment_header(cached.filename)}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": cached.etag})
+    return Response(content=cached.body, media_type=MEDIA_TYPES[type], headers=headers)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..models.user import User
+from ..services.search_index import search_index
+from .auth import get_current_user
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    include_revisions: bool = False,
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full-text search over the current user's sections (and, optionally, their revisions).
+    `q` takes plain words (all must match), "quoted phrases" and prefix* terms.
+    Snippets are HTML-escaped with matches wrapped in <mark>.
+    """
+    if not search_index.available:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search is not available")
+
+    results, has_more = search_index.search(db, current_user.id, q, include_revisions, limit, offset)
+    return {
+        "query": q,
+        "results": results,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if has_more else None,
+    }
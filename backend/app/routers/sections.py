@@ -1,19 +1,29 @@
-from typing import Optional
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
 from ..db import get_db
 from ..models.project import Project
 from ..models.revision import Revision
 from ..models.section import Section
+from ..services.idempotency import run_idempotent
+from ..services.llm_scheduler import Priority, llm_context
+from ..services.refine_index import REFINE_REUSE_MODE, refine_index
+from ..utils.cancellation import OperationCancelled, run_cancellable
+from ..utils.http_cache import REVALIDATE, etag_matches, weak_etag
 from ..utils.jwt_utils import verify_access_token
-from ..workflows.graph import DEFAULT_GRAPH_CONFIG, graph
+from ..utils.timing import timed
+from ..workflows.graph import DEFAULT_GRAPH_CONFIG, get_graph
 from ..workflows.state import SectionState
-from ..services.llm_service import llm_refine
-from google.api_core import exceptions as google_exceptions
+from ..services.llm_service import build_project_context, is_quota_error, llm_refine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,55 +31,96 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Sections"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Refinements of one batch request running at the same time
+BATCH_REFINE_CONCURRENCY = int(os.getenv("BATCH_REFINE_CONCURRENCY", "4"))
+# Sections accepted per batch request
+BATCH_REFINE_MAX_ITEMS = int(os.getenv("BATCH_REFINE_MAX_ITEMS", "50"))
+
 
 class RefineIn(BaseModel):
     feedback: Optional[str] = None   # "like" | "dislike" | "generate"
     user_prompt: Optional[str] = None
     persist: Optional[bool] = True
     current_content: Optional[str] = None 
+    allow_reuse: Optional[bool] = False   # "dislike": accept a stored refinement (REFINE_REUSE_MODE), never auto-saved
+
+
+class BatchRefineItem(BaseModel):
+    section_id: int
+    feedback: Optional[str] = None   # "like" | "dislike" | "generate"
+    user_prompt: Optional[str] = None
+    current_content: Optional[str] = None
+    allow_reuse: Optional[bool] = False
+
+
+class BatchRefineIn(BaseModel):
+    items: List[BatchRefineItem] = Field(..., min_length=1, max_length=BATCH_REFINE_MAX_ITEMS)
+    persist: Optional[bool] = True
 
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     from ..models.user import User as UserModel
-    payload = verify_access_token(token)
-    user_id = payload.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    with timed("auth"):
+        payload = verify_access_token(token)
+        user_id = payload.get("user_id")
+        if not user_id:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        user = db.query(UserModel).filter(UserModel.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
 
 
 @router.get("/sections/{section_id}")
-def get_section(section_id: int, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+def get_section(
+    section_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
     """
     Get single section.
+    Supports If-None-Match: the weak ETag is derived from id/version/status, so a
+    304 is answered without reading the content column.
     """
     # verify token owner (light check)
     payload = verify_access_token(token)
     user_id = payload.get("user_id")
 
-    sec = db.query(Section).filter(Section.id == section_id).first()
+    sec = (
+        db.query(Section.id, Section.project_id, Section.title, Section.version, Section.status)
+        .filter(Section.id == section_id)
+        .first()
+    )
     if not sec:
         raise HTTPException(status_code=404, detail="Section not found")
 
-    proj = db.query(Project).filter(Project.id == sec.project_id).first()
+    proj = db.query(Project.owner_id).filter(Project.id == sec.project_id).first()
     if not proj or proj.owner_id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return {"id": sec.id, "title": sec.title, "content": sec.content, "version": sec.version, "status": sec.status}
+    etag = weak_etag(["section", sec.id, sec.title, sec.version, sec.status])
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": REVALIDATE})
 
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    content = db.query(Section.content).filter(Section.id == section_id).scalar()
+    return {"id": sec.id, "title": sec.title, "content": content, "version": sec.version, "status": sec.status}
 
-from google.api_core import exceptions as google_exceptions  # add to top of file near other imports
-import logging
 
-logger = logging.getLogger(__name__)
+def _section_titles(db: Session, project_id: int):
+    return [t for (t,) in db.query(Section.title).filter(Section.project_id == project_id).order_by(Section.id)]
+
 
 @router.post("/sections/{section_id}/refine")
-def refine_section(
+async def refine_section(
     section_id: int,
     body: RefineIn,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
@@ -79,10 +130,21 @@ def refine_section(
     - feedback = "generate": full LangGraph workflow (generate + auto-refine).
     - feedback = "dislike": single refinement pass using llm_refine (no graph loop).
     - feedback = "like": no LLM, just persist current content if persist=True.
+
+    If the client disconnects, pending LLM work is cancelled and nothing is saved.
+    With an Idempotency-Key header the run is kept (not cancelled) and repeats of
+    the same request get its response instead of refining again.
     """
     payload = verify_access_token(token)
     user_id = payload.get("user_id")
+    with llm_context(user_id, Priority.INTERACTIVE):
+        if idempotency_key:
+            return await run_idempotent(request, response, idempotency_key, user_id, body.model_dump_json().encode(),
+                                        _refine_section, section_id, body, db, user_id)
+        return await run_cancellable(request, "refine_section", _refine_section, section_id, body, db, user_id)
+
 
+def _refine_section(section_id: int, body: RefineIn, db: Session, user_id: int):
     sec = db.query(Section).filter(Section.id == section_id).first()
     if not sec:
         raise HTTPException(status_code=404, detail="Section not found")
@@ -95,42 +157,58 @@ def refine_section(
     persist_flag = bool(getattr(body, "persist", True))
     feedback = (body.feedback or "generate").lower()
 
+    project_context = None
+    if feedback not in ("like", "dislike"):
+        project_context = build_project_context(proj.title, _section_titles(db, proj.id))
+
+    outcome = _compute_refinement(sec, proj.doc_type, project_context, feedback, body, user_id)
+    # a reused refinement is only saved once the user has seen it (a following "like")
+    persist_flag = persist_flag and not outcome.reused
+
+    if persist_flag:
+        try:
+            _stage_refinement(db, sec, outcome)
+            db.commit()
+            db.refresh(sec)
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to persist %s refinement", feedback)
+            raise HTTPException(status_code=500, detail=_SAVE_ERRORS.get(feedback, _SAVE_ERRORS["generate"]))
+
+    return _refinement_response(sec, outcome, feedback, persist_flag)
+
+
+@dataclass
+class _Refinement:
+    content: str
+    version: int
+    score: Optional[float] = None
+    reused: bool = False
+    similarity: Optional[float] = None
+
+
+_SAVE_ERRORS = {
+    "like": "Failed to save approved content",
+    "dislike": "Failed to save refined content",
+    "generate": "Failed to save generated content",
+}
+
+
+def _compute_refinement(sec: Section, doc_type: str, project_context: Optional[str], feedback: str,
+                        body, user_id: int) -> _Refinement:
+    """
+    The LLM part of a refine (no DB access, safe to run on worker threads).
+
+    - feedback = "generate": full LangGraph workflow (generate + auto-refine).
+    - feedback = "dislike": single refinement pass using llm_refine (no graph loop).
+    - feedback = "like": no LLM, keep the current content.
+    """
     # -------------------------
     # 1) LOOKS GOOD / LIKE
     # -------------------------
     if feedback == "like":
         # Use the latest content coming from the UI if provided
-        content_to_save = (body.current_content or sec.content or "")
-
-        if persist_flag:
-            try:
-                version = sec.version + 1
-                rev = Revision(
-                    section_id=sec.id,
-                    version=version,
-                    content=content_to_save,
-                    score=None,
-                )
-                db.add(rev)
-
-                sec.content = content_to_save
-                sec.version = version
-                sec.status = "refined"
-                db.add(sec)
-                db.commit()
-                db.refresh(sec)
-            except Exception:
-                db.rollback()
-                logger.exception("Failed to persist 'like' content")
-                raise HTTPException(status_code=500, detail="Failed to save approved content")
-
-        return {
-            "id": sec.id,
-            "content": content_to_save,
-            "version": sec.version,
-            "score": None,
-            "persisted": persist_flag,
-        }
+        return _Refinement(body.current_content or sec.content or "", sec.version + 1)
 
     # -------------------------
     # 2) NEEDS CHANGES / DISLIKE
@@ -140,50 +218,30 @@ def refine_section(
         base_text = (body.current_content or sec.content or "")
         user_instruction = body.user_prompt or "Improve clarity and structure while preserving meaning."
 
+        # same (or, in "reuse" mode, near-duplicate) text + same instruction → reuse an earlier
+        # refinement instead of calling Gemini; opt-in per request, and returned unsaved
+        use_index = REFINE_REUSE_MODE in ("exact", "reuse")
+        match = refine_index.lookup(user_id, base_text, user_instruction) if use_index and body.allow_reuse else None
+        if match is not None:
+            return _Refinement(match.output, sec.version + 1, reused=True, similarity=round(match.similarity, 3))
+
         try:
             refined = llm_refine(
                 content=base_text,
                 improvement_focus=user_instruction,
                 user_prompt=user_instruction,
             )
-        except google_exceptions.ResourceExhausted:
-            logger.warning("LLM quota exhausted on dislike-refine")
-            raise HTTPException(status_code=503, detail="LLM quota exhausted — try again later.")
-        except Exception:
+        except OperationCancelled:
+            raise
+        except Exception as exc:
+            if is_quota_error(exc):
+                logger.warning("LLM quota exhausted on dislike-refine")
+                raise HTTPException(status_code=503, detail="LLM quota exhausted — try again later.")
             logger.exception("llm_refine failed on dislike")
             raise HTTPException(status_code=500, detail="Refinement failed")
-
-        if persist_flag:
-            try:
-                version = sec.version + 1
-                rev = Revision(
-                    section_id=sec.id,
-                    version=version,
-                    content=refined,
-                    score=None,
-                )
-                db.add(rev)
-
-                sec.content = refined
-                sec.version = version
-                sec.status = "refined"
-                db.add(sec)
-                db.commit()
-                db.refresh(sec)
-            except Exception:
-                db.rollback()
-                logger.exception("Failed to persist refined content for dislike")
-                raise HTTPException(status_code=500, detail="Failed to save refined content")
-
-        # If not persisting, still return the refined text so the editor updates
-        return {
-            "id": sec.id,
-            "content": refined,
-            "version": sec.version + (1 if persist_flag else 0),
-            "score": None,
-            "persisted": persist_flag,
-        }
-
+        if use_index:
+            refine_index.add(user_id, base_text, user_instruction, refined)
+        return _Refinement(refined, sec.version + 1)
 
     # -------------------------
     # 3) GENERATE / DEFAULT → use LangGraph
@@ -202,70 +260,148 @@ def refine_section(
     state = SectionState(
         section_id=sec.id,
         section_title=sec.title,
-        doc_type=proj.doc_type,
+        doc_type=doc_type,
         content=sec.content,
         context_summary=combined_context,
         user_prompt=body.user_prompt,
         user_feedback="pending",
+        version=sec.version + 1,
+        # same prefix as the project-wide generation, so the cached handle is reused
+        project_id=sec.project_id,
+        project_context=project_context,
     )
 
     try:
-        result = graph.invoke(state, config=DEFAULT_GRAPH_CONFIG)
-    except google_exceptions.ResourceExhausted:
-        logger.warning("LLM quota exhausted on generate")
-        raise HTTPException(status_code=503, detail="LLM quota exhausted — try again later.")
-    except Exception:
+        result = get_graph().invoke(state, config=DEFAULT_GRAPH_CONFIG)
+    except OperationCancelled:
+        raise
+    except Exception as exc:
+        if is_quota_error(exc):
+            logger.warning("LLM quota exhausted on generate")
+            raise HTTPException(status_code=503, detail="LLM quota exhausted — try again later.")
         logger.exception("Workflow invocation failed on generate")
         raise HTTPException(status_code=500, detail="Generation failed")
 
     if isinstance(result, dict):
-        final_content = result.get("content")
-        version = result.get("version", sec.version + 1)
-        score = result.get("score")
-    else:
-        final_content = result.content
-        version = result.version
-        score = result.score
+        return _Refinement(result.get("content"), result.get("version", sec.version + 1), result.get("score"))
+    return _Refinement(result.content, result.version, result.score)
 
-    if persist_flag:
-        try:
-            rev = Revision(
-                section_id=sec.id,
-                version=version,
-                content=final_content,
-                score=score,
-            )
-            db.add(rev)
 
-            sec.content = final_content
-            sec.version = version
-            sec.status = "refined"
-            db.add(sec)
-            db.commit()
-            db.refresh(sec)
-        except Exception:
-            db.rollback()
-            logger.exception("Failed to persist generated content")
-            raise HTTPException(status_code=500, detail="Failed to save generated content")
-
-        return {
-            "id": sec.id,
-            "content": sec.content,
-            "version": sec.version,
-            "score": score,
-            "persisted": True,
-        }
-
-    # preview-only path (you aren’t using this yet, but it’s here)
+def _stage_refinement(db: Session, sec: Section, outcome: _Refinement) -> None:
+    # adds the Revision and updates the section; the caller commits
+    db.add(Revision(section_id=sec.id, version=outcome.version, content=outcome.content, score=outcome.score))
+    sec.content = outcome.content
+    sec.version = outcome.version
+    sec.status = "refined"
+    db.add(sec)
+
+
+def _refinement_response(sec: Section, outcome: _Refinement, feedback: str, persisted: bool) -> dict:
     return {
         "id": sec.id,
-        "content": final_content,
-        "version": version,
-        "score": score,
-        "persisted": False,
+        "content": outcome.content,
+        # unsaved like/dislike previews keep reporting the stored version
+        "version": outcome.version if persisted or feedback not in ("like", "dislike") else sec.version,
+        "score": outcome.score,
+        "persisted": persisted,
+        "reused": outcome.reused,
+        "similarity": outcome.similarity,
     }
 
 
+# ---------------------------------------------
+# Batch refine
+# ---------------------------------------------
+@router.post("/projects/{project_id}/sections/refine")
+async def refine_sections_batch(
+    project_id: int,
+    body: BatchRefineIn,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Refine many sections of one project in a single request. Ownership is checked
+    with one query, refinements run concurrently (BATCH_REFINE_CONCURRENCY), and
+    all successful items are saved in one transaction. Each item gets its own
+    result; a failed item does not block the others.
+    """
+    payload = verify_access_token(token)
+    user_id = payload.get("user_id")
+    with llm_context(user_id, Priority.INTERACTIVE):
+        if idempotency_key:
+            return await run_idempotent(request, response, idempotency_key, user_id, body.model_dump_json().encode(),
+                                        _refine_sections_batch, project_id, body, db, user_id)
+        return await run_cancellable(request, "refine_sections_batch", _refine_sections_batch, project_id, body, db, user_id)
+
+
+def _refine_sections_batch(project_id: int, body: BatchRefineIn, db: Session, user_id: int):
+    section_ids = {item.section_id for item in body.items}
+    if len(section_ids) != len(body.items):
+        raise HTTPException(status_code=400, detail="Each section may appear only once per batch")
+
+    # project + requested sections in one round trip
+    rows = (
+        db.query(Project, Section)
+        .outerjoin(Section, and_(Section.project_id == Project.id, Section.id.in_(section_ids)))
+        .filter(Project.id == project_id)
+        .all()
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Project not found")
+    proj = rows[0][0]
+    if proj.owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    sections = {sec.id: sec for _, sec in rows if sec is not None}
+
+    feedbacks = [(item.feedback or "generate").lower() for item in body.items]
+    project_context = None
+    if any(f not in ("like", "dislike") for f in feedbacks):
+        project_context = build_project_context(proj.title, _section_titles(db, proj.id))
+
+    def compute(item, feedback):
+        sec = sections.get(item.section_id)
+        if sec is None:
+            raise HTTPException(status_code=404, detail="Section not found")
+        return _compute_refinement(sec, proj.doc_type, project_context, feedback, item, user_id)
+
+    # each task runs in its own copy of the request context (LLM priority, cancellation, timings)
+    with ThreadPoolExecutor(max_workers=BATCH_REFINE_CONCURRENCY, thread_name_prefix="batch-refine") as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, compute, item, feedback)
+            for item, feedback in zip(body.items, feedbacks)
+        ]
+
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())   # OperationCancelled propagates: a cancelled batch saves nothing
+        except HTTPException as exc:
+            outcomes.append(exc)
+
+    persist_flag = bool(body.persist)
+    if persist_flag:
+        try:
+            for item, outcome in zip(body.items, outcomes):
+                if isinstance(outcome, _Refinement) and not outcome.reused:
+                    _stage_refinement(db, sections[item.section_id], outcome)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to persist batch refine for project %s", project_id)
+            raise HTTPException(status_code=500, detail="Failed to save refined content")
+
+    results = []
+    for item, feedback, outcome in zip(body.items, feedbacks, outcomes):
+        if isinstance(outcome, HTTPException):
+            results.append({"id": item.section_id, "ok": False, "status_code": outcome.status_code,
+                             "detail": outcome.detail})
+        else:
+            persisted = persist_flag and not outcome.reused
+            results.append({"ok": True, **_refinement_response(sections[item.section_id], outcome, feedback, persisted)})
+    return {"project_id": project_id, "persisted": persist_flag, "results": results}
 
 
 @router.get("/sections/{section_id}/revisions")
@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Iterator, List
+
+from ..db import SessionLocal
+from ..models.project import Project
+from ..models.section import Section
+from .export_cache import export_cache, section_fingerprint
+from .export_service import export_filename
+from .metrics import metrics
+from .render_pool import RenderQueueFull, RenderWorkerLost, render_pool
+
+# Max renders a single bulk export keeps in flight; bounds memory to roughly this many artifacts
+BULK_EXPORT_MAX_INFLIGHT = int(os.getenv("BULK_EXPORT_MAX_INFLIGHT", str(render_pool.workers * 2)))
+
+
+class _ZipSink:
+    """
+    Write-only, non-seekable file object for zipfile: collects the bytes written
+    since the last drain() so they can be streamed to the client immediately.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _archive_name(project: Project, fmt: str) -> str:
+    safe_title = re.sub(r"[^\w\- .]+", "_", project.title).strip() or "project"
+    return f"{project.id}_{safe_title}.{fmt}"
+
+
+def iter_bulk_export_zip(project_ids: List[int], formats: List[str]) -> Iterator[bytes]:
+    """
+    Render every (project, format) pair concurrently through the render pool and
+    stream a ZIP archive, adding each file as soon as its render finishes.
+    Only BULK_EXPORT_MAX_INFLIGHT artifacts are held in memory at any time.
+    """
+    sink = _ZipSink()
+    manifest = []
+    inflight = {}
+    db = SessionLocal()
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            pending_jobs = [(pid, fmt) for pid in project_ids for fmt in formats]
+
+            def _add(name: str, data: bytes, entry: dict):
+                archive.writestr(name, data)
+                entry.update({"file": name, "status": "ok", "bytes": len(data)})
+                manifest.append(entry)
+
+            while pending_jobs or inflight:
+                # keep the pool busy, up to the in-flight window
+                while pending_jobs and len(inflight) < BULK_EXPORT_MAX_INFLIGHT:
+                    project_id, fmt = pending_jobs[0]
+                    project = db.query(Project).filter(Project.id == project_id).first()
+                    if project is None:
+                        pending_jobs.pop(0)
+                        manifest.append({"project_id": project_id, "format": fmt, "status": "missing"})
+                        continue
+
+                    fingerprint = section_fingerprint(db, project)
+                    cached = export_cache.get(project.id, fmt, fingerprint)
+                    if cached is not None:
+                        pending_jobs.pop(0)
+                        _add(_archive_name(project, fmt), cached.body, {"project_id": project.id, "format": fmt})
+                        yield sink.drain()
+                        continue
+
+                    rows = db.query(Section.title, Section.content).filter(Section.project_id == project.id).order_by(Section.id).all()
+                    content_map = {r.title: r.content or "" for r in rows}
+                    try:
+                        future = render_pool.submit(fmt, project.title, content_map, template=project.doc_type)
+                    except RenderQueueFull:
+                        if inflight:
+                            break  # wait for one of ours to finish first
+                        time.sleep(0.2)
+                        continue
+                    except RenderWorkerLost:
+                        continue  # the pool broke earlier; this submit starts a fresh one
+                    pending_jobs.pop(0)
+                    inflight[future] = (project, fmt, fingerprint)
+
+                if not inflight:
+                    continue
+
+                done, _ = wait(list(inflight), timeout=render_pool.timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # nothing finished within one render timeout: give up on everything still running
+                    for future, (project, fmt, _) in inflight.items():
+                        future.cancel()
+                        metrics.incr("export_render_timeouts_total", format=fmt)
+                        manifest.append({"project_id": project.id, "format": fmt, "status": "timeout"})
+                    inflight.clear()
+                    continue
+
+                for future in done:
+                    project, fmt, fingerprint = inflight.pop(future)
+                    entry = {"project_id": project.id, "format": fmt}
+                    try:
+                        data = future.result()
+                    except RenderWorkerLost as exc:
+                        # the ZIP is already streaming, so no 503: mark the entry for the client to retry
+                        entry.update({"status": "unavailable", "error": str(exc)})
+                        manifest.append(entry)
+                        continue
+                    except Exception as exc:
+                        entry.update({"status": "error", "error": str(exc)})
+                        manifest.append(entry)
+                        continue
+                    export_cache.put(project.id, fmt, fingerprint, export_filename(project.title, fmt), data)
+                    _add(_archive_name(project, fmt), data, entry)
+                    del data
+                    yield sink.drain()
+
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        yield sink.drain()
+    finally:
+        # client went away mid-stream: don't leave our renders occupying the pool
+        for future in inflight:
+            future.cancel()
+        db.close()
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Hashable, List, Optional
+
+from ..utils.cancellation import OperationCancelled
+from .llm_scheduler import current_llm_context
+from .llm_service import llm_evaluate, llm_evaluate_batch
+from .metrics import metrics
+
+# Sections packed into one evaluation call
+EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "5"))
+# Longest a section waits for others to join its evaluation batch
+EVAL_BATCH_WAIT_MS = float(os.getenv("EVAL_BATCH_WAIT_MS", "300"))
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[str] = []
+        self.results: Optional[list] = None
+        self.error: Optional[BaseException] = None
+        self.closed = False
+        self.done = threading.Event()
+
+
+class EvaluationBatcher:
+    """
+    Groups evaluate calls that arrive together into one llm_evaluate_batch call.
+    The first caller of a batch leads it: it waits until the batch is full, every
+    active participant (a section workflow registered via participant()) has
+    joined, or EVAL_BATCH_WAIT_MS passes, then evaluates for everyone. Batches
+    never mix users or priority classes.
+    """
+
+    def __init__(self, max_batch: int = EVAL_BATCH_SIZE, max_wait: float = EVAL_BATCH_WAIT_MS / 1000):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._open: Dict[Hashable, _Batch] = {}
+        self._participants: Dict[Hashable, int] = {}
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def participant(self):
+        """
+        Mark one section workflow as a potential batch member for its whole run.
+        """
+        key = current_llm_context()
+        with self._cond:
+            self._participants[key] = self._participants.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._participants[key] -= 1
+                if not self._participants[key]:
+                    del self._participants[key]
+                self._cond.notify_all()
+
+    def evaluate(self, content: str) -> dict:
+        key = current_llm_context()
+        with self._cond:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            index = len(batch.items)
+            batch.items.append(content)
+            if len(batch.items) >= self.max_batch:
+                self._close(key, batch)
+            self._cond.notify_all()
+
+        if not leader:
+            batch.done.wait()
+            if isinstance(batch.error, OperationCancelled):
+                # the leader's request went away; this section still needs its score
+                return llm_evaluate(content)
+            if batch.error is not None:
+                raise batch.error
+            return batch.results[index]
+
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while not batch.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or len(batch.items) >= self._participants.get(key, 1):
+                    break
+                self._cond.wait(remaining)
+            self._close(key, batch)
+
+        try:
+            batch.results = llm_evaluate_batch(batch.items)
+        except BaseException as exc:
+            batch.error = exc
+            raise
+        finally:
+            batch.done.set()
+        metrics.incr("llm_evaluate_batches_total")
+        metrics.observe("llm_evaluate_batch_size", len(batch.items))
+        return batch.results[0]
+
+    def _close(self, key: Hashable, batch: _Batch) -> None:
+        if self._open.get(key) is batch:
+            del self._open[key]
+        batch.closed = True
+
+
+evaluation_batcher = EvaluationBatcher()
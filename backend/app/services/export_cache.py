@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models.project import Project
+from ..models.section import Section
+from ..utils.http_cache import strong_etag
+
+# Upper bound on the rendered bytes kept in memory (LRU eviction beyond this)
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+@dataclass(frozen=True)
+class CachedExport:
+    fingerprint: str
+    filename: str
+    body: bytes
+    etag: str
+
+
+class ExportCache:
+    """
+    In-process cache of rendered DOCX/PPTX artifacts.
+
+    Entries are stored per (project_id, format) and are only served while their
+    fingerprint (section ids, versions, statuses, titles and the project title)
+    still matches the database, so a stale entry can never be returned even if an
+    invalidation was missed (e.g. a write made by another worker process or the
+    bulk generation CLI).
+    """
+
+    def __init__(self, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[int, str], CachedExport]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: int, fmt: str, fingerprint: str) -> Optional[CachedExport]:
+        key = (project_id, fmt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, project_id: int, fmt: str, fingerprint: str, filename: str, body: bytes) -> CachedExport:
+        entry = CachedExport(fingerprint=fingerprint, filename=filename, body=body, etag=strong_etag(body))
+        if len(body) > self.max_bytes:
+            return entry
+
+        key = (project_id, fmt)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = entry
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+        return entry
+
+    def invalidate(self, project_ids: Iterable[int]) -> None:
+        project_ids = set(project_ids)
+        if not project_ids:
+            return
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in project_ids]:
+                self._size -= len(self._entries.pop(key).body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+export_cache = ExportCache()
+
+
+def section_fingerprint(db: Session, project: Project) -> str:
+    """
+    Hash of everything the rendered document depends on, read without loading
+    the (potentially large) section content column. Content only changes together
+    with version or status: the first generation of a pending section keeps
+    version 1 but moves it out of "pending".
+    """
+    rows = (
+        db.query(Section.id, Section.version, Section.status, Section.title)
+        .filter(Section.project_id == project.id)
+        .order_by(Section.id)
+        .all()
+    )
+    payload = json.dumps([project.title, [list(r) for r in rows]], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------
+# Automatic invalidation on commit
+# ---------------------------------------------------
+_DIRTY_KEY = "export_cache_dirty_projects"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_projects(session, flush_context):
+    dirty = session.info.setdefault(_DIRTY_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Section) and obj.project_id is not None:
+            dirty.add(obj.project_id)
+        elif isinstance(obj, Project) and obj.id is not None:
+            dirty.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    export_cache.invalidate(session.info.pop(_DIRTY_KEY, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
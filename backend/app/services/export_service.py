@@ -1,8 +1,10 @@
+import html
+import io
 import os
 from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
 
-from docx import Document
-from pptx import Presentation
+from .export_templates import templates
 
 
 EXPORT_DIR = os.path.join(os.path.dirname(__file__), "exports")
@@ -10,36 +12,50 @@ EXPORT_DIR = os.path.join(os.path.dirname(__file__), "exports")
 # ✅ ensure export folder exists
 os.makedirs(EXPORT_DIR, exist_ok=True)
 
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+# Lightweight text formats, produced section by section (see STREAM_WRITERS)
+STREAMING_MEDIA_TYPES = {
+    "md": "text/markdown; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+
 
 # ---------------------------------------------------
-# ✅ EXPORT DOCX
+# ✅ RENDER DOCX
 # ---------------------------------------------------
-def export_to_docx(project_title: str, sections: dict) -> str:
+def render_docx(project_title: str, sections: dict, template: Optional[str] = None) -> bytes:
     """
+    Render the project to an in-memory DOCX package.
+
     sections = {
         "Introduction": "content...",
         "Problem Statement": "content...",
     }
     """
-    doc = Document()
+    doc = templates.new("docx", template)
     doc.add_heading(project_title, level=1)
 
     for title, content in sections.items():
         doc.add_heading(title, level=2)
         doc.add_paragraph(content)
 
-    filename = f"{project_title}_{timestamp()}.docx"
-    filepath = os.path.join(EXPORT_DIR, filename)
-    doc.save(filepath)
-
-    return filepath
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
 
 
 # ---------------------------------------------------
-# ✅ EXPORT PPTX
+# ✅ RENDER PPTX
 # ---------------------------------------------------
-def export_to_pptx(project_title: str, sections: dict) -> str:
-    pres = Presentation()
+def render_pptx(project_title: str, sections: dict, template: Optional[str] = None) -> bytes:
+    """
+    Render the project to an in-memory PPTX package (one slide per section).
+    """
+    pres = templates.new("pptx", template)
 
     # ✅ title slide
     title_slide_layout = pres.slide_layouts[0]
@@ -54,11 +70,82 @@ def export_to_pptx(project_title: str, sections: dict) -> str:
         textbox = slide.shapes.placeholders[1].text_frame
         textbox.text = content
 
-    filename = f"{project_title}_{timestamp()}.pptx"
-    filepath = os.path.join(EXPORT_DIR, filename)
-    pres.save(filepath)
+    buffer = io.BytesIO()
+    pres.save(buffer)
+    return buffer.getvalue()
 
-    return filepath
+
+RENDERERS = {
+    "docx": render_docx,
+    "pptx": render_pptx,
+}
+
+
+def render_export(fmt: str, project_title: str, sections: dict, template: Optional[str] = None) -> bytes:
+    """
+    Render `sections` in the requested format ("docx" or "pptx") and return the file bytes.
+    `template` names a registered template (see export_templates); unknown names use the default.
+    """
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return renderer(project_title, sections, template)
+
+
+# ---------------------------------------------------
+# ✅ STREAMING MARKDOWN / HTML
+# ---------------------------------------------------
+def iter_markdown(project_title: str, sections: Iterable[Tuple[str, str]]) -> Iterator[str]:
+    """
+    Yield a Markdown document piece by piece; `sections` is consumed lazily,
+    so each section is written out as soon as it is read.
+    """
+    yield f"# {_single_line(project_title)}\n\n"
+    for title, content in sections:
+        yield f"## {_single_line(title)}\n\n{(content or '').strip()}\n\n"
+
+
+def iter_html(project_title: str, sections: Iterable[Tuple[str, str]]) -> Iterator[str]:
+    """
+    Yield a standalone HTML document piece by piece (same laziness as iter_markdown).
+    """
+    title = html.escape(project_title)
+    yield (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n"
+    )
+    for section_title, content in sections:
+        paragraphs = [p.strip() for p in (content or "").split("\n\n") if p.strip()]
+        body = "".join(f"<p>{html.escape(p)}</p>\n" for p in paragraphs)
+        yield f"<section>\n<h2>{html.escape(section_title)}</h2>\n{body}</section>\n"
+    yield "</body>\n</html>\n"
+
+
+STREAM_WRITERS = {
+    "md": iter_markdown,
+    "html": iter_html,
+}
+
+
+# ---------------------------------------------------
+# ✅ EXPORT DOCX
+# ---------------------------------------------------
+def export_to_docx(project_title: str, sections: dict) -> str:
+    """
+    sections = {
+        "Introduction": "content...",
+        "Problem Statement": "content...",
+    }
+    """
+    return _write_export(export_filename(project_title, "docx"), render_docx(project_title, sections))
+
+
+# ---------------------------------------------------
+# ✅ EXPORT PPTX
+# ---------------------------------------------------
+def export_to_pptx(project_title: str, sections: dict) -> str:
+    return _write_export(export_filename(project_title, "pptx"), render_pptx(project_title, sections))
 
 
 # ---------------------------------------------------
@@ -66,3 +153,18 @@ def export_to_pptx(project_title: str, sections: dict) -> str:
 # ---------------------------------------------------
 def timestamp():
     return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def export_filename(project_title: str, fmt: str) -> str:
+    return f"{project_title}_{timestamp()}.{fmt}"
+
+
+def _single_line(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def _write_export(filename: str, data: bytes) -> str:
+    filepath = os.path.join(EXPORT_DIR, filename)
+    with open(filepath, "wb") as fh:
+        fh.write(data)
+    return filepath
@@ -0,0 +1,119 @@
+import copy
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+# Optional directory of custom templates, named "<doc_type>.docx" / "<doc_type>.pptx"
+EXPORT_TEMPLATE_DIR = os.getenv("EXPORT_TEMPLATE_DIR")
+
+DEFAULT_TEMPLATE = "default"
+
+_FORMATS = ("docx", "pptx")
+
+
+def _open(fmt: str, stream):
+    # python-docx / python-pptx are imported on first use to keep app import cheap
+    if fmt == "docx":
+        from docx import Document
+        return Document(stream)
+    from pptx import Presentation
+    return Presentation(stream)
+
+
+def _default_path(fmt: str) -> str:
+    if fmt == "docx":
+        from docx.api import _default_docx_path
+        return _default_docx_path()
+    from pptx.api import _default_pptx_path
+    return _default_pptx_path()
+
+
+class TemplateRegistry:
+    """
+    Export templates loaded once and kept as immutable bytes, each with a parsed
+    prototype. Every export gets a deep copy of the prototype, which skips
+    re-reading and re-unzipping the template package.
+    """
+
+    def __init__(self):
+        self._blobs: Dict[Tuple[str, str], bytes] = {}
+        self._prototypes: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, fmt: str, name: str, source: Union[str, Path, bytes]) -> None:
+        """
+        Register a template for `fmt` ("docx" / "pptx") under `name` (usually a doc_type).
+        `source` is a file path or the raw package bytes; it is validated by parsing it once.
+        """
+        if fmt not in _FORMATS:
+            raise ValueError(f"Unsupported template format: {fmt}")
+        blob = bytes(source) if isinstance(source, (bytes, bytearray)) else Path(source).read_bytes()
+        prototype = _open(fmt, io.BytesIO(blob))
+        with self._lock:
+            self._blobs[(fmt, name)] = blob
+            self._prototypes[(fmt, name)] = prototype
+
+    def preload(self) -> None:
+        """
+        Load the python-docx/python-pptx default templates plus everything in EXPORT_TEMPLATE_DIR.
+        """
+        for fmt in _FORMATS:
+            if (fmt, DEFAULT_TEMPLATE) not in self._blobs:
+                self.register(fmt, DEFAULT_TEMPLATE, _default_path(fmt))
+
+        if EXPORT_TEMPLATE_DIR and os.path.isdir(EXPORT_TEMPLATE_DIR):
+            for path in sorted(Path(EXPORT_TEMPLATE_DIR).iterdir()):
+                fmt = path.suffix.lstrip(".").lower()
+                if fmt in _FORMATS and path.is_file():
+                    try:
+                        self.register(fmt, path.stem, path)
+                    except Exception:
+                        logger.exception("Skipping invalid export template %s", path)
+
+    def snapshot(self) -> Dict[Tuple[str, str], bytes]:
+        """
+        Raw template bytes, used to seed render worker processes.
+        """
+        with self._lock:
+            return dict(self._blobs)
+
+    def load_snapshot(self, blobs: Dict[Tuple[str, str], bytes]) -> None:
+        for (fmt, name), blob in blobs.items():
+            self.register(fmt, name, blob)
+
+    def new(self, fmt: str, name: Optional[str] = None):
+        """
+        Fresh Document/Presentation for `name`, falling back to the default template.
+        """
+        if (fmt, DEFAULT_TEMPLATE) not in self._prototypes:
+            self.preload()
+        key = (fmt, name) if (fmt, name) in self._prototypes else (fmt, DEFAULT_TEMPLATE)
+        prototype = self._prototypes[key]
+        try:
+            return copy.deepcopy(prototype)
+        except Exception:
+            # never fail an export because the fast path broke; re-parse the bytes instead
+            logger.exception("Template deepcopy failed for %s, re-parsing", key)
+            return _open(fmt, io.BytesIO(self._blobs[key]))
+
+
+templates = TemplateRegistry()
+
+
+def register_template(fmt: str, name: str, source: Union[str, Path, bytes]) -> None:
+    templates.register(fmt, name, source)
+
+
+def preload_templates(blobs: Optional[Dict[Tuple[str, str], bytes]] = None) -> None:
+    """
+    Startup hook (API process) and initializer (render workers).
+    """
+    if blobs:
+        templates.load_snapshot(blobs)
+    templates.preload()
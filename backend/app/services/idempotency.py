@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+from ..utils.cancellation import too_many_requests
+from .llm_executor import LLMQueueFull, llm_executor
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# How long a completed response is replayed for the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Upper bound on remembered keys (oldest completed entries are dropped first)
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+
+class IdempotencyConflict(Exception):
+    """
+    The key was already used with a different request payload.
+    """
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.future: Future = Future()
+        self.expires_at: Optional[float] = None   # set once the response is stored
+
+
+class IdempotencyStore:
+    """
+    In-process store of responses keyed by (user, endpoint, Idempotency-Key).
+    The first request runs the work; repeats either get the stored response or
+    wait on the run still in progress. Failed runs are not stored, so a retry
+    after an error runs again. Per process: multiple workers need sticky routing
+    or a shared store.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        # entries are in insertion order, so expired ones sit at the front;
+        # runs still in progress are never dropped
+        stale = []
+        excess = len(self._entries) - self.max_keys
+        for key, entry in self._entries.items():
+            if entry.expires_at is None:
+                continue
+            if entry.expires_at > now and excess <= 0:
+                break
+            stale.append(key)
+            excess -= 1
+        for key in stale:
+            del self._entries[key]
+
+    async def run(self, key: Hashable, fingerprint: str, work: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        Returns (result, replayed).
+        """
+        with self._lock:
+            self._purge(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint != fingerprint:
+                raise IdempotencyConflict()
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry(fingerprint)
+
+        if not owner:
+            metrics.incr("idempotency_replays_total", state="stored" if entry.future.done() else "in_progress")
+            return await asyncio.wrap_future(entry.future), True
+
+        try:
+            result = await work()
+        except BaseException as exc:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.future.set_exception(exc)   # requests attached to this run see the same error
+            raise
+        entry.expires_at = time.monotonic() + self.ttl
+        entry.future.set_result(result)
+        return result, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+idempotency_store = IdempotencyStore()
+
+
+def request_fingerprint(request: Request, payload: bytes = b"") -> str:
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(payload)
+    return digest.hexdigest()
+
+
+async def run_idempotent(
+    request: Request,
+    response: Response,
+    idempotency_key: str,
+    user_id: int,
+    payload: bytes,
+    fn,
+    *args,
+):
+    """
+    Run blocking `fn` (on the LLM executor) at most once per (user, endpoint, key) within the TTL.
+    The run is not tied to the connection: a client that times out and retries
+    with the same key picks up the result instead of starting over.
+    """
+    key = (user_id, request.url.path, idempotency_key)
+    try:
+        result, replayed = await idempotency_store.run(
+            key, request_fingerprint(request, payload), lambda: llm_executor.run(fn, *args)
+        )
+    except IdempotencyConflict:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request",
+        )
+    except LLMQueueFull as exc:
+        raise too_many_requests(exc)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from .metrics import metrics
+
+# Threads running request-level LLM work (refine, generate); the default
+# threadpool serving auth / CRUD routes is never used for it
+LLM_EXECUTOR_WORKERS = int(os.getenv("LLM_EXECUTOR_WORKERS", "16"))
+# LLM jobs allowed to wait for one of those threads; beyond that requests get 429
+LLM_EXECUTOR_QUEUE_LIMIT = int(os.getenv("LLM_EXECUTOR_QUEUE_LIMIT", "32"))
+
+# Job duration assumed for Retry-After before any job has finished
+_DEFAULT_JOB_SECONDS = 10.0
+_MAX_RETRY_AFTER = 120
+
+
+class LLMQueueFull(Exception):
+    """Raised when LLM_EXECUTOR_WORKERS jobs run and LLM_EXECUTOR_QUEUE_LIMIT more are waiting."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM work queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMExecutor:
+    """
+    Bounded executor for blocking LLM-bound request work. Admission is decided
+    up front: once `workers` jobs run and `queue_limit` wait, submit() rejects
+    immediately instead of queueing, so slow Gemini calls back up here and not
+    in the threadpool that cheap endpoints depend on.
+    """
+
+    def __init__(self, workers: int = LLM_EXECUTOR_WORKERS, queue_limit: int = LLM_EXECUTOR_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self._pending = 0
+        self._avg_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="llm-job")
+            return self._executor
+
+    def retry_after(self) -> int:
+        """
+        Seconds until a slot is likely free: queued jobs ahead, spread over the workers.
+        """
+        with self._lock:
+            waiting = max(0, self._pending - self.workers) + 1
+            seconds = self._avg_seconds or _DEFAULT_JOB_SECONDS
+        return max(1, min(_MAX_RETRY_AFTER, math.ceil(waiting * seconds / self.workers)))
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Run `fn` on an LLM worker thread, in a copy of the caller's context.
+        Raises LLMQueueFull when the executor is saturated.
+        """
+        with self._lock:
+            admitted = self._pending < self.workers + self.queue_limit
+            if admitted:
+                self._pending += 1
+                metrics.gauge("llm_executor_pending", self._pending)
+        if not admitted:
+            metrics.incr("llm_admission_rejected_total")
+            raise LLMQueueFull(self.retry_after())
+
+        enqueued = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def job():
+            started = time.perf_counter()
+            metrics.observe("llm_executor_wait_seconds", started - enqueued)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                self._finished(time.perf_counter() - started)
+
+        try:
+            future = self._get_executor().submit(job)
+        except BaseException:
+            self._finished(None)
+            raise
+        # jobs dropped by shutdown() never run, so release their slot here
+        future.add_done_callback(lambda f: f.cancelled() and self._finished(None))
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _finished(self, seconds: Optional[float]) -> None:
+        with self._lock:
+            self._pending -= 1
+            metrics.gauge("llm_executor_pending", self._pending)
+            if seconds is not None:
+                # exponentially weighted, so Retry-After follows the current Gemini latency
+                self._avg_seconds = seconds if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self._pending,
+                "avg_job_seconds": round(self._avg_seconds, 3) if self._avg_seconds is not None else None,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+llm_executor = LLMExecutor()
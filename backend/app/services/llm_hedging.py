@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from .llm_scheduler import llm_scheduler
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: send a duplicate Gemini call when the first one is slower than usual
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") in ("1", "true", "True")
+# Hedge once a call has run longer than this percentile of recent latencies
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Extra calls allowed, as a fraction of all calls (0.05 = at most ~5% more Gemini traffic)
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+# Latency samples needed before hedging starts, and the floor for the hedge delay
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+
+_MAX_BURST = 5.0
+
+
+class Hedger:
+    """
+    Hedged requests (Dean & Barroso, "The Tail at Scale"): run the call, and if it
+    has not finished after the recent p95 (configurable), send one duplicate and
+    return whichever finishes first. Extra calls come out of a token bucket
+    refilled by `budget` per call, and only use a free scheduler slot.
+    """
+
+    def __init__(self, enabled: bool = LLM_HEDGE_ENABLED, percentile: float = LLM_HEDGE_PERCENTILE,
+                 budget: float = LLM_HEDGE_BUDGET, min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+                 min_delay: float = LLM_HEDGE_MIN_DELAY):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._latencies = deque(maxlen=512)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=llm_scheduler.max_concurrency * 2 + 2, thread_name_prefix="llm-hedge"
+                )
+            return self._executor
+
+    def hedge_delay(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def _timed(self, fn: Callable, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def call(self, fn: Callable, *args):
+        """
+        Run fn(*args) (a blocking Gemini call), hedging it if it runs long.
+        """
+        with self._lock:
+            self._tokens = min(_MAX_BURST, self._tokens + self.budget)
+
+        delay = self.hedge_delay()
+        if not self.enabled or delay is None:
+            return self._timed(fn, *args)
+
+        primary = self._pool().submit(self._timed, fn, *args)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if not self._take_token():
+            metrics.incr("llm_hedges_skipped_total", reason="budget")
+            return primary.result()
+        if not llm_scheduler.try_reserve():
+            with self._lock:
+                self._tokens += 1.0
+            metrics.incr("llm_hedges_skipped_total", reason="capacity")
+            return primary.result()
+
+        hedge = self._pool().submit(self._timed, fn, *args)
+        self._release_when_both_done(primary, hedge)
+        metrics.incr("llm_hedges_sent_total")
+
+        pending = {primary, hedge}
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    metrics.incr("llm_hedges_total", outcome="won" if future is hedge else "lost")
+                    return future.result()
+                errors.append(future.exception())
+        raise errors[0]
+
+    @staticmethod
+    def _release_when_both_done(primary, hedge) -> None:
+        # the hedge's scheduler slot stays taken until the slower call has actually finished
+        remaining = [2]
+        lock = threading.Lock()
+
+        def _done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                llm_scheduler.release()
+
+        primary.add_done_callback(_done)
+        hedge.add_done_callback(_done)
+
+
+hedger = Hedger()
@@ -0,0 +1,208 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from ..utils.cancellation import raise_if_cancelled
+from ..utils.timing import timed
+from .metrics import metrics
+
+# Concurrent Gemini calls allowed across the process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# A queued call moves up one priority class for every this many seconds it waits
+LLM_PRIORITY_AGING_SECONDS = float(os.getenv("LLM_PRIORITY_AGING_SECONDS", "15"))
+
+# How often a queued caller re-checks its request for cancellation
+_CANCEL_POLL_INTERVAL = 0.25
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0   # single-section refine, someone is waiting in the editor
+    BULK = 1          # whole-project generation, scripts
+    EVALUATION = 2    # background scoring calls
+
+
+_context: ContextVar[Tuple[Hashable, Priority]] = ContextVar("llm_context", default=(None, Priority.BULK))
+
+
+@contextmanager
+def llm_context(user_id: Hashable, priority: Priority):
+    """
+    Tag LLM calls made inside the block (including worker threads started from it)
+    with the requesting user and priority class.
+    """
+    token = _context.set((user_id, priority))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_llm_context() -> Tuple[Hashable, Priority]:
+    return _context.get()
+
+
+class _Job:
+    __slots__ = ("finish", "seq", "user", "priority", "enqueued", "granted", "event")
+
+    def __init__(self, finish: float, seq: int, user: Hashable, priority: Priority):
+        self.finish = finish
+        self.seq = seq
+        self.user = user
+        self.priority = priority
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.event = threading.Event()
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.finish, self.seq) < (other.finish, other.seq)
+
+
+class LLMScheduler:
+    """
+    Admission control for Gemini calls: at most `max_concurrency` run at once.
+    Waiting calls are served strictly by priority class (with aging so nothing
+    starves), and within a class by weighted fair queuing across users
+    (self-clocked virtual finish tags), so one user's 40-section generation
+    interleaves with other users' calls instead of running ahead of them.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, aging_seconds: float = LLM_PRIORITY_AGING_SECONDS):
+        self.max_concurrency = max(1, max_concurrency)
+        self.aging_seconds = aging_seconds
+        self._queues: Dict[Priority, List[_Job]] = {p: [] for p in Priority}
+        self._last_finish: Dict[Hashable, float] = {}
+        self._weights: Dict[Hashable, float] = {}
+        self._virtual_time = 0.0
+        self._running = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def set_weight(self, user_id: Hashable, weight: float) -> None:
+        """
+        Relative share for `user_id` (default 1.0); a weight of 2 gets twice the calls under contention.
+        """
+        with self._lock:
+            self._weights[user_id] = max(weight, 0.01)
+
+    @staticmethod
+    def priority_for(context_priority: Priority, kind: str) -> Priority:
+        # evaluations of an interactive request stay interactive: the user is waiting on them
+        if kind == "evaluate" and context_priority != Priority.INTERACTIVE:
+            return Priority.EVALUATION
+        return context_priority
+
+    @contextmanager
+    def slot(self, kind: str = "generate"):
+        """
+        Hold one LLM concurrency slot for the duration of the block.
+        """
+        user, context_priority = _context.get()
+        job = self._enqueue(user, self.priority_for(context_priority, kind))
+        try:
+            with timed("llm_queue"):
+                while not job.event.wait(_CANCEL_POLL_INTERVAL):
+                    raise_if_cancelled()
+        except BaseException:
+            self._abandon(job)
+            raise
+
+        metrics.observe("llm_queue_wait_seconds", time.perf_counter() - job.enqueued, priority=job.priority.name.lower())
+        try:
+            yield
+        finally:
+            self._release()
+
+    def try_reserve(self) -> bool:
+        """
+        Take a slot only if one is free and nobody is queued (for optional extra
+        calls such as hedges). Pair with release().
+        """
+        with self._lock:
+            if self._running >= self.max_concurrency or any(self._queues.values()):
+                return False
+            self._running += 1
+            self._publish()
+            return True
+
+    def release(self) -> None:
+        self._release()
+
+    # -- internals (all called with or taking self._lock) --
+    def _enqueue(self, user: Hashable, priority: Priority) -> _Job:
+        with self._lock:
+            start = max(self._virtual_time, self._last_finish.get(user, 0.0))
+            finish = start + 1.0 / self._weights.get(user, 1.0)
+            self._last_finish[user] = finish
+            job = _Job(finish, next(self._seq), user, priority)
+            heapq.heappush(self._queues[priority], job)
+            metrics.incr("llm_scheduled_total", priority=priority.name.lower())
+            self._dispatch()
+            self._publish()
+        return job
+
+    def _abandon(self, job: _Job) -> None:
+        with self._lock:
+            if job.granted:
+                self._running -= 1
+            else:
+                queue = self._queues[job.priority]
+                queue.remove(job)
+                heapq.heapify(queue)
+            self._dispatch()
+            self._publish()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+            self._publish()
+
+    def _next_job(self) -> Optional[_Job]:
+        now = time.perf_counter()
+        best, best_key = None, None
+        for priority, queue in self._queues.items():
+            if not queue:
+                continue
+            head = queue[0]
+            aged = int((now - head.enqueued) / self.aging_seconds) if self.aging_seconds > 0 else 0
+            key = (max(0, priority - aged), head.finish, head.seq)
+            if best_key is None or key < best_key:
+                best, best_key = head, key
+        return best
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency:
+            job = self._next_job()
+            if job is None:
+                break
+            heapq.heappop(self._queues[job.priority])
+            self._virtual_time = max(self._virtual_time, job.finish)
+            self._running += 1
+            job.granted = True
+            job.event.set()
+
+        if len(self._last_finish) > 1024:
+            # users whose tags are behind the virtual clock start from it anyway
+            self._last_finish = {u: f for u, f in self._last_finish.items() if f > self._virtual_time}
+
+    def _publish(self) -> None:
+        for priority, queue in self._queues.items():
+            metrics.gauge("llm_queue_depth", len(queue), priority=priority.name.lower())
+        metrics.gauge("llm_inflight", self._running)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "queued": {p.name.lower(): len(q) for p, q in self._queues.items()},
+            }
+
+
+llm_scheduler = LLMScheduler()
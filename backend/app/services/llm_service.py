@@ -1,9 +1,17 @@
 import os
 import json
+import threading
+from functools import partial
 from pathlib import Path
-import google.generativeai as genai
 from dotenv import load_dotenv  # if you're already using this elsewhere, it's fine
 
+from ..utils.cancellation import raise_if_cancelled
+from ..utils.timing import timed
+from .llm_hedging import hedger
+from .llm_scheduler import llm_scheduler
+from .metrics import metrics
+from .prompt_cache import prompt_cache
+
 # Load the local .env if it lives alongside the app package, then fall back to defaults
 package_dir = Path(__file__).resolve().parent.parent
 load_dotenv(package_dir / ".env")
@@ -12,16 +20,101 @@ load_dotenv()
 # ✅ Read key from environment instead of hard-coding
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
 
-if not GENAI_API_KEY:
-    # Fail loudly so you know it's misconfigured rather than silently calling with None
-    raise RuntimeError("GENAI_API_KEY is not set. Please add it to your .env file.")
+MODEL_NAME = "gemini-2.5-flash"
+
+# Created on first use (or by warm-up) so importing this module stays cheap.
+# Assign a stand-in object here to replace Gemini (benchmarks, local runs).
+model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """
+    Import google.generativeai and configure the client on first use.
+    """
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                if not GENAI_API_KEY:
+                    # Fail loudly so you know it's misconfigured rather than silently calling with None
+                    raise RuntimeError("GENAI_API_KEY is not set. Please add it to your .env file.")
+                import google.generativeai as genai
+
+                genai.configure(api_key=GENAI_API_KEY)
+                model = genai.GenerativeModel(MODEL_NAME)
+    return model
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """
+    True for Gemini "resource exhausted" (quota / rate limit) errors.
+    """
+    if type(exc).__name__ != "ResourceExhausted":
+        return False
+    from google.api_core import exceptions as google_exceptions
+
+    return isinstance(exc, google_exceptions.ResourceExhausted)
+
+
+def _generate(prompt: str, kind: str = "generate", prefix: str = None, prefix_key=None):
+    """
+    Single choke point for Gemini calls (timed as the "llm" phase of the request).
+    Calls wait for a slot in the shared scheduler; `kind` feeds its priority.
+    Slow calls may be hedged (LLM_HEDGE_ENABLED).
+    With `prefix`, `prompt` is only the suffix: the prefix is registered once per
+    `prefix_key` in the prompt cache and reused by every call sharing it.
+    Also the cancellation point: a cancelled request makes no further calls, and
+    a response that arrives after cancellation is dropped.
+    """
+    raise_if_cancelled()
+    with llm_scheduler.slot(kind):
+        with timed("llm"):
+            model = get_model()
+            if prefix is None:
+                sent = len(prompt.encode("utf-8"))
+                send = model.generate_content
+            else:
+                handle = prompt_cache.register(prefix_key, prefix, model)
+                sent = prompt_cache.sent_bytes(handle, prompt)
+                send = partial(prompt_cache.send, handle, model=model)
+            metrics.incr("llm_prompt_bytes_sent_total", sent)
+            metrics.observe("llm_prompt_bytes", sent, kind=kind)
+            response = hedger.call(send, prompt)
+    raise_if_cancelled()
+    return response
+
+
+def build_project_context(project_title: str, section_titles: list) -> str:
+    """
+    Project-scoped context shared by every section prompt of a project.
+    """
+    outline = "\n".join(f"- {title}" for title in section_titles)
+    return f"Project: {project_title}\n\nDocument outline:\n{outline}"
+
 
-genai.configure(api_key=GENAI_API_KEY)
+def project_prompt_prefix(doc_type: str, project_context: str) -> str:
+    """
+    Stable part of the section prompt: identical for every section of a project.
+    """
+    return f"""
+    You are writing the sections of a {doc_type.upper()} document, one section per request.
 
-model = genai.GenerativeModel("gemini-2.5-flash")
+    Project context:
+    \"\"\"{project_context}\"\"\"
+
+    Requirements for every section:
+    - 180–220 words
+    - Professional and coherent tone
+    - Single flowing paragraph
+    - No repetition
+    - Do not include the section title in the output
+    - Match the expected style for {doc_type.upper()}
+    """
 
 
-def llm_generate_section(section_title: str, doc_type: str, context_summary: str) -> str:
+def llm_generate_section(section_title: str, doc_type: str, context_summary: str,
+                         project_context: str = None, project_key=None) -> str:
     """
     Generate a professional document section based on a title, document type,
     and contextual summary.
@@ -30,10 +123,28 @@ def llm_generate_section(section_title: str, doc_type: str, context_summary: str
         section_title (str): Title of the section to be generated.
         doc_type (str): Type of document (e.g., report, proposal).
         context_summary (str): Short contextual summary guiding the output.
+        project_context (str, optional): Project-wide context; when given, it goes
+            into a cached prefix shared by all sections of `project_key`.
+        project_key (optional): Identifies the project for the prefix cache.
 
     Returns:
         str: Generated section text.
     """
+    if project_context is not None:
+        suffix = f"""
+    Write the section titled:
+
+    "{section_title}"
+    """
+        if context_summary:
+            suffix += f"""
+    Section notes:
+    \"\"\"{context_summary}\"\"\"
+    """
+        response = _generate(suffix, prefix=project_prompt_prefix(doc_type, project_context),
+                             prefix_key=project_key)
+        return response.text.strip()
+
     prompt = f"""
     Generate detailed content for a {doc_type.upper()} document section titled:
 
@@ -51,7 +162,7 @@ def llm_generate_section(section_title: str, doc_type: str, context_summary: str
     - Match the expected style for {doc_type.upper()}
     """
 
-    response = model.generate_content(prompt)
+    response = _generate(prompt)
     return response.text.strip()
 
 
@@ -88,7 +199,7 @@ def llm_evaluate(content: str) -> dict:
     }}
     """
 
-    response = model.generate_content(prompt)
+    response = _generate(prompt, kind="evaluate")
     cleaned = response.text.strip().replace("```json", "").replace("```", "")
 
     try:
@@ -100,6 +211,77 @@ def llm_evaluate(content: str) -> dict:
         }
 
 
+def _valid_evaluation(entry) -> bool:
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("score"), (int, float))
+        and isinstance(entry.get("improvement_focus"), str)
+    )
+
+
+def llm_evaluate_batch(contents: list) -> list:
+    """
+    Evaluate several sections in one call.
+
+    Parameters:
+        contents (list): Section texts to evaluate.
+
+    Returns:
+        list: One {"score", "improvement_focus"} dict per input, in order. Entries
+        missing or malformed in the batched answer are evaluated individually.
+    """
+    if len(contents) == 1:
+        return [llm_evaluate(contents[0])]
+
+    sections = "\n".join(
+        f"""
+    Section {i}:
+    \"\"\"{content}\"\"\"
+    """
+        for i, content in enumerate(contents, start=1)
+    )
+    prompt = f"""
+    Evaluate each of the following {len(contents)} document sections independently and respond only in JSON.
+    {sections}
+    Score each section 1–10 based on:
+    - clarity
+    - relevance
+    - structure
+    - depth
+
+    JSON array response format (one entry per section):
+    [
+      {{
+        "section": <section number>,
+        "score": <number>,
+        "improvement_focus": "<one short sentence>"
+      }}
+    ]
+    """
+
+    response = _generate(prompt, kind="evaluate")
+    cleaned = response.text.strip().replace("```json", "").replace("```", "")
+
+    parsed = {}
+    try:
+        entries = json.loads(cleaned)
+    except json.JSONDecodeError:
+        entries = []
+    if isinstance(entries, list):
+        for entry in entries:
+            if _valid_evaluation(entry) and isinstance(entry.get("section"), int):
+                parsed[entry["section"]] = {"score": entry["score"], "improvement_focus": entry["improvement_focus"]}
+
+    results = []
+    for i, content in enumerate(contents, start=1):
+        if i in parsed:
+            results.append(parsed[i])
+        else:
+            metrics.incr("llm_evaluate_fallbacks_total")
+            results.append(llm_evaluate(content))
+    return results
+
+
 def llm_refine(content: str, improvement_focus: str, user_prompt: str = None) -> str:
     """
     Refine existing content based on either an automated improvement focus
@@ -136,7 +318,7 @@ Very important requirements:
 - Return ONLY the revised text, with no explanations, no bullet points, no markdown.
 """
 
-    response = model.generate_content(prompt)
+    response = _generate(prompt, kind="refine")
     return response.text.strip()
 
 
@@ -170,7 +352,7 @@ def llm_refine_outline(raw_outline: list, doc_type: str) -> list:
     ["Introduction", "Problem Statement", "Methodology", "Conclusion"]
     """
 
-    response = model.generate_content(prompt)
+    response = _generate(prompt, kind="outline")
     cleaned = response.text.strip().replace("```json", "").replace("```", "")
 
     try:
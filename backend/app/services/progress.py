@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set
+
+from .metrics import metrics
+
+# Events kept per project so a subscriber that connects mid-run catches up
+PROGRESS_HISTORY = int(os.getenv("PROGRESS_HISTORY", "500"))
+# Projects whose recent events are kept (least recently active are dropped)
+PROGRESS_MAX_PROJECTS = int(os.getenv("PROGRESS_MAX_PROJECTS", "256"))
+# Events buffered per subscriber before the oldest are dropped (slow client)
+PROGRESS_QUEUE_SIZE = int(os.getenv("PROGRESS_QUEUE_SIZE", "256"))
+
+
+class Subscription:
+    """
+    One subscriber's view of a project: the events published before it joined
+    (`replay`) and a queue of live ones, filled from any thread.
+    """
+
+    def __init__(self, project_id: int, replay: List[dict], loop: asyncio.AbstractEventLoop):
+        self.project_id = project_id
+        self.replay = replay
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=PROGRESS_QUEUE_SIZE)
+
+    def push(self, event: dict) -> None:
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            metrics.incr("progress_events_dropped_total")
+        self._queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+
+class ProgressBroker:
+    """
+    In-process fan-out of per-project progress events (section started, node
+    entered, score, section committed, ...) from the generation threads to
+    WebSocket subscribers. Events carry a broker-wide increasing `seq`.
+    """
+
+    def __init__(self, history: int = PROGRESS_HISTORY, max_projects: int = PROGRESS_MAX_PROJECTS):
+        self.history = history
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._recent: "OrderedDict[int, deque]" = OrderedDict()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def publish(self, project_id: Optional[int], type: str, **fields) -> None:
+        if project_id is None:
+            return
+        with self._lock:
+            event = {"type": type, "project_id": project_id, "seq": next(self._seq), "ts": round(time.time(), 3), **fields}
+            recent = self._recent.pop(project_id, None)
+            if recent is None or type == "generation_started":
+                recent = deque(maxlen=self.history)
+            recent.append(event)
+            self._recent[project_id] = recent
+            while len(self._recent) > self.max_projects:
+                self._recent.popitem(last=False)
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+        metrics.incr("progress_events_total", type=type)
+
+    @contextmanager
+    def subscribe(self, project_id: int):
+        """
+        Must be entered on the event loop that will read the subscription.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            subscription = Subscription(project_id, list(self._recent.get(project_id, ())), loop)
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+        metrics.gauge_add("progress_subscribers", 1)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(project_id)
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[project_id]
+            metrics.gauge_add("progress_subscribers", -1)
+
+
+progress_broker = ProgressBroker()
+
+
+def publish_section(state, type: str, **fields) -> None:
+    """
+    Publish an event about the section a workflow state belongs to. Only project
+    generation reports progress: a single-section refine also carries project_id
+    (for the prompt cache) but is not part of a run subscribers are following.
+    """
+    if not state.report_progress:
+        return
+    progress_broker.publish(state.project_id, type, section_id=state.section_id, **fields)
+
+
+def node_progress(node: str):
+    """
+    Decorator for LangGraph nodes: publishes `node_entered` before the node runs.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(state):
+            publish_section(state, "node_entered", node=node, version=state.version, attempt=state.attempts)
+            return fn(state)
+
+        return wrapper
+
+    return decorator
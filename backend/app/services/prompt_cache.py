@@ -0,0 +1,167 @@
+import hashlib
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Hashable
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# "gemini" (provider-side context caching when the SDK supports it, else inline prompts) or "local" (stand-in)
+PROMPT_CACHE_BACKEND = os.getenv("PROMPT_CACHE_BACKEND", "gemini").lower()
+# Lifetime of a registered prefix; re-registered after it expires
+PROMPT_CACHE_TTL_SECONDS = float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+# Prefixes smaller than this are sent inline (provider caches have a minimum size)
+PROMPT_CACHE_MIN_BYTES = int(os.getenv("PROMPT_CACHE_MIN_BYTES", "16384"))
+# Registered prefixes kept (one per project)
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "256"))
+
+
+@dataclass
+class CachedPrefix:
+    key: Hashable
+    digest: str
+    text: str
+    remote: object = None          # provider handle; None = send the prefix inline
+    expires_at: float = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.text.encode("utf-8"))
+
+
+class PromptCache:
+    """
+    Registry of project-scoped prompt prefixes. `register` returns a handle for
+    (key, prefix text), reusing it while the text is unchanged and unexpired, so
+    a project's prefix is registered once per version. `send` issues the
+    per-section suffix against the handle.
+
+    The base class has no provider cache and always sends prefix + suffix.
+    """
+
+    backend = "inline"
+
+    def __init__(self, ttl: float = PROMPT_CACHE_TTL_SECONDS, min_bytes: int = PROMPT_CACHE_MIN_BYTES,
+                 max_entries: int = PROMPT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.min_bytes = min_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedPrefix]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, key: Hashable, prefix: str, model) -> CachedPrefix:
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                return entry
+
+        remote = None
+        if len(prefix.encode("utf-8")) >= self.min_bytes:
+            try:
+                remote = self._create_remote(prefix, model)
+            except Exception:
+                logger.warning("Prompt prefix cache unavailable for %s, sending inline", key, exc_info=True)
+        entry = CachedPrefix(key, digest, prefix, remote, now + self.ttl)
+        metrics.incr("prompt_cache_registrations_total", backend=self.backend if remote is not None else "inline")
+
+        with self._lock:
+            stale = [self._entries.pop(key, None)]
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                stale.append(self._entries.popitem(last=False)[1])
+        for old in stale:
+            if old is not None and old.remote is not None:
+                self._drop_remote(old)
+        return entry
+
+    @staticmethod
+    def sent_bytes(handle: CachedPrefix, suffix: str) -> int:
+        suffix_bytes = len(suffix.encode("utf-8"))
+        return suffix_bytes if handle.remote is not None else handle.nbytes + suffix_bytes
+
+    def send(self, handle: CachedPrefix, suffix: str, model):
+        if handle.remote is None:
+            return model.generate_content(handle.text + suffix)
+        metrics.incr("llm_prompt_bytes_cached_total", handle.nbytes)
+        return self._send_remote(handle, suffix, model)
+
+    # provider hooks
+    def _create_remote(self, prefix: str, model):
+        return None
+
+    def _send_remote(self, handle: CachedPrefix, suffix: str, model):
+        return model.generate_content(handle.text + suffix)
+
+    def _drop_remote(self, handle: CachedPrefix) -> None:
+        pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class GeminiPromptCache(PromptCache):
+    """
+    Gemini context caching (google-generativeai >= 0.7: genai.caching.CachedContent).
+    Older SDKs, stand-in models and small prefixes fall back to inline prompts.
+    """
+
+    backend = "gemini"
+
+    def _create_remote(self, prefix: str, model):
+        if not type(model).__module__.startswith("google.generativeai"):
+            return None   # simulated / stand-in model
+        import google.generativeai as genai
+
+        caching = getattr(genai, "caching", None)
+        if caching is None or not isinstance(model, genai.GenerativeModel):
+            return None
+        return caching.CachedContent.create(
+            model=model.model_name,
+            contents=[prefix],
+            ttl=timedelta(seconds=self.ttl),
+        )
+
+    def _send_remote(self, handle: CachedPrefix, suffix: str, model):
+        import google.generativeai as genai
+
+        return genai.GenerativeModel.from_cached_content(cached_content=handle.remote).generate_content(suffix)
+
+    def _drop_remote(self, handle: CachedPrefix) -> None:
+        try:
+            handle.remote.delete()
+        except Exception:
+            logger.debug("Could not delete cached prompt prefix %s", handle.key, exc_info=True)
+
+
+class LocalPromptCache(PromptCache):
+    """
+    In-process stand-in for provider caching (tests, benchmarks, simulated models):
+    behaves as if the prefix were stored remotely, so only suffix bytes count as
+    sent, while the model still receives the full prompt text.
+    """
+
+    backend = "local"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._handles = itertools.count(1)
+
+    def _create_remote(self, prefix: str, model):
+        return f"local-prefix-{next(self._handles)}"
+
+    def _send_remote(self, handle: CachedPrefix, suffix: str, model):
+        return model.generate_content(handle.text + suffix)
+
+
+prompt_cache: PromptCache = LocalPromptCache() if PROMPT_CACHE_BACKEND == "local" else GeminiPromptCache()
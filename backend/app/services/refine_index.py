@@ -0,0 +1,161 @@
+import hashlib
+import itertools
+import os
+import random
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from .metrics import metrics
+
+# "off" disables the index; "exact" reuses a stored refinement only for the same text (whitespace
+# aside); "reuse" also for near-duplicates, which can drop a small edit made in between
+REFINE_REUSE_MODE = os.getenv("REFINE_REUSE_MODE", "off").lower()
+# Minimum estimated Jaccard similarity (word 5-shingles) between base texts to reuse a refinement
+REFINE_REUSE_THRESHOLD = float(os.getenv("REFINE_REUSE_THRESHOLD", "0.9"))
+# Refinements remembered (least recently used are dropped)
+REFINE_INDEX_MAX_ENTRIES = int(os.getenv("REFINE_INDEX_MAX_ENTRIES", "5000"))
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16                      # 16 bands x 4 rows: candidates from ~0.5 similarity up
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5EED)    # fixed seed: deterministic signatures
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+
+def _normalize_instruction(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.blake2b(" ".join((text or "").split()).encode("utf-8"), digest_size=16).digest()
+
+
+def _shingles(text: str) -> Set[int]:
+    words = _WORD.findall((text or "").lower())
+    k = min(SHINGLE_SIZE, len(words))
+    if k == 0:
+        return set()
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + k]).encode(), digest_size=8).digest(), "big")
+        for i in range(len(words) - k + 1)
+    }
+
+
+def minhash(text: str) -> Optional[Tuple[int, ...]]:
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    return tuple(min((a * s + b) % _MERSENNE for s in shingles) for a, b in _PERMUTATIONS)
+
+
+def _similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+@dataclass(frozen=True)
+class RefineMatch:
+    output: str
+    similarity: float
+
+
+class RefineIndex:
+    """
+    Local MinHash/LSH index of past dislike-refinements: (base text, instruction)
+    -> refined text. Lookups only match the same user and the same (normalized)
+    instruction, with a base text whose estimated similarity clears the threshold.
+    With `exact`, MinHash is only the pre-filter: the base text must also be the
+    same up to whitespace.
+    """
+
+    def __init__(self, threshold: float = REFINE_REUSE_THRESHOLD, max_entries: int = REFINE_INDEX_MAX_ENTRIES,
+                 exact: bool = REFINE_REUSE_MODE == "exact"):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.exact = exact
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()   # id -> (scope, signature, output, digest)
+        self._buckets: Dict[tuple, Set[int]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope(user_id: Hashable, instruction: str) -> tuple:
+        return (user_id, _normalize_instruction(instruction))
+
+    @staticmethod
+    def _band_keys(scope: tuple, signature: Tuple[int, ...]) -> List[tuple]:
+        return [(scope, band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+    def lookup(self, user_id: Hashable, base_text: str, instruction: str) -> Optional[RefineMatch]:
+        signature = minhash(base_text)
+        digest = _text_digest(base_text) if self.exact else None
+        match = None
+        if signature is not None:
+            scope = self._scope(user_id, instruction)
+            with self._lock:
+                candidates = set()
+                for key in self._band_keys(scope, signature):
+                    candidates |= self._buckets.get(key, set())
+                best_id, best = None, 0.0
+                for entry_id in candidates:
+                    if digest is not None and self._entries[entry_id][3] != digest:
+                        continue
+                    similarity = _similarity(signature, self._entries[entry_id][1])
+                    if similarity > best:
+                        best_id, best = entry_id, similarity
+                if best_id is not None and best >= self.threshold:
+                    self._entries.move_to_end(best_id)
+                    match = RefineMatch(self._entries[best_id][2], best)
+        self._record(match is not None)
+        return match
+
+    def add(self, user_id: Hashable, base_text: str, instruction: str, output: str) -> None:
+        signature = minhash(base_text)
+        if signature is None or not output:
+            return
+        scope = self._scope(user_id, instruction)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (scope, signature, output, _text_digest(base_text))
+            for key in self._band_keys(scope, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+            metrics.gauge("refine_index_entries", len(self._entries))
+
+    def _evict_oldest(self) -> None:
+        entry_id, (scope, signature, _, _) = self._entries.popitem(last=False)
+        for key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            total = self.hits + self.misses
+            hit_rate = self.hits / total
+        metrics.incr("refine_index_lookups_total", result="hit" if hit else "miss")
+        metrics.gauge("refine_index_hit_rate", round(hit_rate, 4))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.hits = self.misses = 0
+
+
+refine_index = RefineIndex()
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from .export_templates import preload_templates, templates
+from .metrics import metrics
+
+# Worker processes used for DOCX/PPTX rendering
+EXPORT_RENDER_WORKERS = int(os.getenv("EXPORT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Max renders queued or running at once; further submissions are rejected
+EXPORT_RENDER_QUEUE_LIMIT = int(os.getenv("EXPORT_RENDER_QUEUE_LIMIT", "16"))
+# Seconds a caller waits for a single render before giving up
+EXPORT_RENDER_TIMEOUT = float(os.getenv("EXPORT_RENDER_TIMEOUT", "60"))
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue already holds EXPORT_RENDER_QUEUE_LIMIT jobs."""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within its timeout."""
+
+
+class RenderWorkerLost(Exception):
+    """Raised when a render worker process died; the next render starts a fresh pool."""
+
+
+def _render_job(fmt: str, project_title: str, sections: dict, template: Optional[str] = None):
+    # Runs inside a worker process: only plain data goes in, only bytes come out.
+    from .export_service import render_export
+
+    start = time.perf_counter()
+    data = render_export(fmt, project_title, sections, template)
+    return data, time.perf_counter() - start
+
+
+class RenderPool:
+    """
+    Bounded process pool for CPU-bound export rendering, so python-docx/python-pptx
+    never hold the GIL of the API process.
+    """
+
+    def __init__(self, workers: int = EXPORT_RENDER_WORKERS, queue_limit: int = EXPORT_RENDER_QUEUE_LIMIT,
+                 timeout: float = EXPORT_RENDER_TIMEOUT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(1, queue_limit)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn" keeps workers from inheriting locks/sockets of the threaded API process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    # workers start with the same parsed templates as the API process
+                    initializer=preload_templates,
+                    initargs=(templates.snapshot(),),
+                )
+            return self._executor
+
+    def _discard_broken(self, executor: ProcessPoolExecutor) -> None:
+        # A dead worker marks the whole ProcessPoolExecutor broken; its manager thread
+        # already terminates the remaining workers, so only our reference has to go.
+        with self._lock:
+            if self._executor is not executor:
+                return   # already replaced by another caller
+            self._executor = None
+        metrics.incr("export_render_pool_restarts_total")
+
+    def submit(self, fmt: str, project_title: str, sections: dict, template: Optional[str] = None) -> Future:
+        """
+        Queue a render and return a Future resolving to the file bytes.
+        Raises RenderQueueFull instead of blocking when the queue is at its limit, and
+        RenderWorkerLost (here or through the Future) when a worker process died.
+        """
+        if not self._slots.acquire(blocking=False):
+            metrics.incr("export_render_rejected_total", format=fmt)
+            raise RenderQueueFull(f"Render queue is full ({self.queue_limit} jobs)")
+
+        submitted_at = time.perf_counter()
+        metrics.incr("export_render_submitted_total", format=fmt)
+        metrics.gauge_add("export_render_inflight", 1)
+
+        executor = self._get_executor()
+        try:
+            job = executor.submit(_render_job, fmt, project_title, dict(sections), template)
+        except BrokenProcessPool as exc:
+            self._release()
+            self._discard_broken(executor)
+            raise RenderWorkerLost("Render worker died; retry the export") from exc
+        except Exception:
+            self._release()
+            raise
+
+        result: Future = Future()
+
+        def _done(f: Future):
+            self._release()
+            if result.done():
+                # caller gave up (timeout) before the worker finished
+                return
+            if f.cancelled():
+                result.cancel()
+                return
+            exc = f.exception()
+            if isinstance(exc, BrokenProcessPool):
+                self._discard_broken(executor)
+                metrics.incr("export_render_failed_total", format=fmt)
+                lost = RenderWorkerLost("Render worker died; retry the export")
+                lost.__cause__ = exc
+                result.set_exception(lost)
+                return
+            if exc is not None:
+                metrics.incr("export_render_failed_total", format=fmt)
+                result.set_exception(exc)
+                return
+            data, render_seconds = f.result()
+            metrics.observe("export_render_seconds", render_seconds, format=fmt)
+            metrics.observe("export_render_total_seconds", time.perf_counter() - submitted_at, format=fmt)
+            result.set_result(data)
+
+        job.add_done_callback(_done)
+        # cancelling the returned future also drops the job if no worker picked it up yet
+        result.add_done_callback(lambda r: job.cancel() if r.cancelled() else None)
+        return result
+
+    def render(self, fmt: str, project_title: str, sections: dict, template: Optional[str] = None,
+               timeout: Optional[float] = None) -> bytes:
+        """
+        Render synchronously (from a request thread) with a per-export timeout.
+        """
+        future = self.submit(fmt, project_title, sections, template)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            metrics.incr("export_render_timeouts_total", format=fmt)
+            raise RenderTimeout(f"Rendering {fmt} export timed out")
+
+    def _release(self):
+        metrics.gauge_add("export_render_inflight", -1)
+        self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+render_pool = RenderPool()
@@ -0,0 +1,209 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, func, not_, select, text
+
+from ..db import SessionLocal, engine
+from ..models.revision import Revision
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Newest revisions always kept per section (0 keeps every revision and disables retention)
+REVISION_KEEP_LAST = int(os.getenv("REVISION_KEEP_LAST", "20"))
+# Beyond those, the last revision of each day is kept for this many days
+REVISION_KEEP_DAILY_DAYS = int(os.getenv("REVISION_KEEP_DAILY_DAYS", "30"))
+# Seconds between background retention passes
+REVISION_RETENTION_INTERVAL_SECONDS = float(os.getenv("REVISION_RETENTION_INTERVAL_SECONDS", "3600"))
+# Rows deleted per transaction, and the pause between transactions that lets writers in
+REVISION_RETENTION_BATCH_SIZE = int(os.getenv("REVISION_RETENTION_BATCH_SIZE", "500"))
+REVISION_RETENTION_BATCH_PAUSE = float(os.getenv("REVISION_RETENTION_BATCH_PAUSE", "0.05"))
+# Free pages returned to the filesystem per incremental_vacuum step (SQLite)
+VACUUM_STEP_PAGES = int(os.getenv("VACUUM_STEP_PAGES", "1000"))
+
+# Sections examined per victim query
+_SECTION_CHUNK = 200
+
+
+class RevisionRetention:
+    """
+    Prunes old revisions in the background: per section it keeps the newest
+    `keep_last` revisions plus the last revision of each day within
+    `daily_days`. Deletes run in short batches with pauses so request writes
+    are never queued behind a long transaction; afterwards SQLite free pages
+    are handed back with incremental vacuum, a step at a time.
+    """
+
+    def __init__(self, keep_last: int = REVISION_KEEP_LAST, daily_days: int = REVISION_KEEP_DAILY_DAYS,
+                 interval: float = REVISION_RETENTION_INTERVAL_SECONDS,
+                 batch_size: int = REVISION_RETENTION_BATCH_SIZE, pause: float = REVISION_RETENTION_BATCH_PAUSE,
+                 session_factory=SessionLocal, bind=engine):
+        self.keep_last = keep_last
+        self.daily_days = daily_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.session_factory = session_factory
+        self.bind = bind
+        self.last_run: Optional[dict] = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep_last > 0
+
+    # ---------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------
+    def prepare(self) -> None:
+        """
+        Before tables are created: a new SQLite file gets auto_vacuum=INCREMENTAL
+        (an existing file keeps its mode until a one-off VACUUM converts it).
+        """
+        if self.bind.dialect.name != "sqlite":
+            return
+        with self.bind.connect() as conn:
+            mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+            empty = conn.execute(text("SELECT count(*) FROM sqlite_master")).scalar() == 0
+            if mode != 2 and empty:
+                conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.exec_driver_sql("VACUUM")   # writes the header so the mode sticks
+            elif mode != 2:
+                logger.info("SQLite auto_vacuum is off; run `PRAGMA auto_vacuum=INCREMENTAL; VACUUM;` once "
+                            "so pruned revisions give space back")
+
+    def start(self) -> None:
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="revision-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Revision retention pass failed")
+
+    # ---------------------------------------------
+    # Pruning
+    # ---------------------------------------------
+    def _victims(self, db, section_ids: List[int]) -> List[int]:
+        newest_first = (Revision.version.desc(), Revision.id.desc())
+        ranked = select(
+            Revision.id,
+            Revision.created_at,
+            func.row_number().over(partition_by=Revision.section_id, order_by=newest_first).label("recent_rank"),
+            func.row_number().over(
+                partition_by=(Revision.section_id, func.date(Revision.created_at)), order_by=newest_first
+            ).label("daily_rank"),
+        ).where(Revision.section_id.in_(section_ids)).subquery()
+
+        query = select(ranked.c.id).where(ranked.c.recent_rank > self.keep_last)
+        if self.daily_days > 0:
+            cutoff = datetime.utcnow() - timedelta(days=self.daily_days)
+            query = query.where(not_(and_(ranked.c.daily_rank == 1, ranked.c.created_at >= cutoff)))
+        return list(db.execute(query).scalars())
+
+    def _sections_over_limit(self, db, after: int) -> List[int]:
+        return list(db.execute(
+            select(Revision.section_id)
+            .where(Revision.section_id > after)
+            .group_by(Revision.section_id)
+            .having(func.count() > self.keep_last)
+            .order_by(Revision.section_id)
+            .limit(_SECTION_CHUNK)
+        ).scalars())
+
+    def run_once(self) -> dict:
+        """
+        One full pass over all sections; returns what it did. Concurrent calls
+        (admin trigger while the background pass runs) return immediately.
+        """
+        if not self.enabled:
+            return {"status": "disabled"}
+        if not self._run_lock.acquire(blocking=False):
+            return {"status": "busy"}
+        try:
+            started = time.perf_counter()
+            deleted = 0
+            db = self.session_factory()
+            try:
+                after = 0
+                while not self._stop.is_set():
+                    section_ids = self._sections_over_limit(db, after)
+                    if not section_ids:
+                        break
+                    after = section_ids[-1]
+                    victims = self._victims(db, section_ids)
+                    db.rollback()   # end the read transaction before deleting
+                    for i in range(0, len(victims), self.batch_size):
+                        batch = victims[i:i + self.batch_size]
+                        db.execute(delete(Revision).where(Revision.id.in_(batch)))
+                        db.commit()
+                        deleted += len(batch)
+                        metrics.incr("revisions_pruned_total", len(batch))
+                        time.sleep(self.pause)
+            finally:
+                db.close()
+
+            vacuumed = self.vacuum() if deleted else 0
+            seconds = time.perf_counter() - started
+            metrics.incr("retention_passes_total")
+            metrics.observe("retention_pass_seconds", seconds)
+            self.last_run = {
+                "status": "ok",
+                "deleted": deleted,
+                "vacuumed_pages": vacuumed,
+                "seconds": round(seconds, 3),
+                "finished_at": datetime.utcnow().isoformat() + "Z",
+            }
+            if deleted:
+                logger.info("Pruned %d revisions, vacuumed %d pages in %.1fs", deleted, vacuumed, seconds)
+            return self.last_run
+        finally:
+            self._run_lock.release()
+
+    def vacuum(self) -> int:
+        """
+        Return free SQLite pages to the filesystem in VACUUM_STEP_PAGES steps.
+        """
+        if self.bind.dialect.name != "sqlite":
+            return 0
+        released = 0
+        with self.bind.connect() as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                return 0
+            while not self._stop.is_set():
+                free = conn.execute(text("PRAGMA freelist_count")).scalar()
+                metrics.gauge("sqlite_freelist_pages", free)
+                if not free:
+                    break
+                step = min(free, VACUUM_STEP_PAGES)
+                # sqlite3's execute() steps this pragma once (one page); executescript runs it to completion
+                conn.connection.executescript(f"PRAGMA incremental_vacuum({step});")
+                conn.commit()
+                released += step
+                metrics.incr("sqlite_vacuum_pages_total", step)
+                time.sleep(self.pause)
+        return released
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "keep_last": self.keep_last,
+            "daily_days": self.daily_days,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run,
+        }
+
+
+revision_retention = RevisionRetention()
@@ -0,0 +1,189 @@
+import html
+import logging
+import os
+import re
+from typing import List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Also index every Revision.content (larger index, enables ?include_revisions=true)
+SEARCH_INDEX_REVISIONS = os.getenv("SEARCH_INDEX_REVISIONS", "1") not in ("0", "false", "False")
+
+# Markers used inside SQLite, replaced after HTML-escaping the snippet
+_OPEN, _CLOSE = "\x02", "\x03"
+
+# FTS5 tables use views as their external content so every row carries an
+# owner token ("u<user id>"): a user's search is `owner:uN AND (...)`, which
+# FTS answers by intersecting posting lists instead of filtering all matches.
+_OWNER_OF_SECTION = "(SELECT 'u' || p.owner_id FROM projects p WHERE p.id = {row}.project_id)"
+_OWNER_OF_REVISION = (
+    "(SELECT 'u' || p.owner_id FROM sections s JOIN projects p ON p.id = s.project_id "
+    "WHERE s.id = {row}.section_id)"
+)
+
+_SECTIONS_DDL = [
+    """CREATE VIEW IF NOT EXISTS sections_search_src AS
+       SELECT s.id AS id, s.title AS title, s.content AS content, 'u' || p.owner_id AS owner
+       FROM sections s JOIN projects p ON p.id = s.project_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+       title, content, owner,
+       content='sections_search_src', content_rowid='id',
+       tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS sections_fts_ai AFTER INSERT ON sections BEGIN
+       INSERT INTO sections_fts(rowid, title, content, owner)
+       VALUES (new.id, new.title, new.content, {_OWNER_OF_SECTION.format(row="new")});
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sections_fts_ad AFTER DELETE ON sections BEGIN
+       INSERT INTO sections_fts(sections_fts, rowid, title, content, owner)
+       VALUES ('delete', old.id, old.title, old.content, {_OWNER_OF_SECTION.format(row="old")});
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sections_fts_au AFTER UPDATE OF title, content ON sections BEGIN
+       INSERT INTO sections_fts(sections_fts, rowid, title, content, owner)
+       VALUES ('delete', old.id, old.title, old.content, {_OWNER_OF_SECTION.format(row="old")});
+       INSERT INTO sections_fts(rowid, title, content, owner)
+       VALUES (new.id, new.title, new.content, {_OWNER_OF_SECTION.format(row="new")});
+       END""",
+]
+
+_REVISIONS_DDL = [
+    """CREATE VIEW IF NOT EXISTS revisions_search_src AS
+       SELECT r.id AS id, r.content AS content, 'u' || p.owner_id AS owner
+       FROM revisions r JOIN sections s ON s.id = r.section_id JOIN projects p ON p.id = s.project_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS revisions_fts USING fts5(
+       content, owner,
+       content='revisions_search_src', content_rowid='id',
+       tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS revisions_fts_ai AFTER INSERT ON revisions BEGIN
+       INSERT INTO revisions_fts(rowid, content, owner)
+       VALUES (new.id, new.content, {_OWNER_OF_REVISION.format(row="new")});
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS revisions_fts_ad AFTER DELETE ON revisions BEGIN
+       INSERT INTO revisions_fts(revisions_fts, rowid, content, owner)
+       VALUES ('delete', old.id, old.content, {_OWNER_OF_REVISION.format(row="old")});
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS revisions_fts_au AFTER UPDATE OF content ON revisions BEGIN
+       INSERT INTO revisions_fts(revisions_fts, rowid, content, owner)
+       VALUES ('delete', old.id, old.content, {_OWNER_OF_REVISION.format(row="old")});
+       INSERT INTO revisions_fts(rowid, content, owner)
+       VALUES (new.id, new.content, {_OWNER_OF_REVISION.format(row="new")});
+       END""",
+]
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over Section.title / Section.content and (optionally)
+    Revision.content. Triggers keep it in the same transaction as the writes,
+    so it is in sync as of every commit.
+    """
+
+    def __init__(self):
+        self.available = False
+        self.revisions = False
+
+    def install(self, engine, revisions: bool = SEARCH_INDEX_REVISIONS) -> bool:
+        """
+        Create the FTS tables/triggers if missing and backfill them from existing rows.
+        """
+        if engine.dialect.name != "sqlite":
+            logger.info("Full-text search needs SQLite FTS5; /search is disabled")
+            return False
+        ddl = [("sections_fts", _SECTIONS_DDL)] + ([("revisions_fts", _REVISIONS_DDL)] if revisions else [])
+        try:
+            with engine.begin() as conn:
+                for table, statements in ddl:
+                    exists = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table}
+                    ).first()
+                    for statement in statements:
+                        conn.execute(text(statement))
+                    if not exists:
+                        conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+                        logger.info("Built full-text index %s", table)
+        except Exception:
+            logger.exception("Could not set up the full-text index; /search is disabled")
+            return False
+        self.available = True
+        self.revisions = revisions
+        return True
+
+    def search(self, db, user_id: int, query: str, include_revisions: bool = False,
+               limit: int = 20, offset: int = 0):
+        """
+        Ranked (bm25) matches in the user's projects. Returns (results, has_more).
+        """
+        terms = fts_query(query)
+        if terms is None:
+            return [], False
+        # user terms are scoped to the text columns: "u1" must not match the owner token
+        owner = f'owner:"u{int(user_id)}"'
+        params = {
+            "section_match": f"{owner} AND {{title content}}: ({terms})",
+            "revision_match": f"{owner} AND content: ({terms})",
+        }
+
+        arms = [f"""
+            SELECT 'section' AS kind, s.project_id AS project_id, s.id AS section_id, s.title AS section_title,
+                   NULL AS revision_id, s.version AS version,
+                   snippet(sections_fts, 1, '{_OPEN}', '{_CLOSE}', '…', 16) AS snippet,
+                   bm25(sections_fts, 4.0, 1.0, 0.0) AS rank
+            FROM sections_fts JOIN sections s ON s.id = sections_fts.rowid
+            WHERE sections_fts MATCH :section_match"""]
+        if include_revisions and self.revisions:
+            arms.append(f"""
+            SELECT 'revision', s.project_id, s.id, s.title, r.id, r.version,
+                   snippet(revisions_fts, 0, '{_OPEN}', '{_CLOSE}', '…', 16),
+                   bm25(revisions_fts, 1.0, 0.0)
+            FROM revisions_fts JOIN revisions r ON r.id = revisions_fts.rowid JOIN sections s ON s.id = r.section_id
+            WHERE revisions_fts MATCH :revision_match""")
+
+        sql = " UNION ALL ".join(arms) + " ORDER BY rank LIMIT :limit OFFSET :offset"
+        rows = db.execute(text(sql), {**params, "limit": limit + 1, "offset": offset}).mappings().all()
+
+        results = [
+            {
+                "type": row["kind"],
+                "project_id": row["project_id"],
+                "section_id": row["section_id"],
+                "section_title": row["section_title"],
+                "revision_id": row["revision_id"],
+                "version": row["version"],
+                "snippet": _render_snippet(row["snippet"]),
+                "rank": round(-row["rank"], 4),   # bm25 is lower-is-better; expose higher-is-better
+            }
+            for row in rows[:limit]
+        ]
+        return results, len(rows) > limit
+
+
+_TOKEN = re.compile(r'"([^"]+)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+def fts_query(query: str) -> Optional[str]:
+    """
+    User input -> safe FTS5 query: "quoted phrases" stay phrases, other words
+    are ANDed, a trailing * keeps prefix matching. FTS operators are not exposed.
+    """
+    parts: List[str] = []
+    for phrase, word in _TOKEN.findall(query or ""):
+        if phrase:
+            tokens = _WORD.findall(phrase)
+            if tokens:
+                parts.append('"' + " ".join(tokens) + '"')
+        else:
+            tokens = _WORD.findall(word)
+            prefix = word.endswith("*")
+            for i, token in enumerate(tokens):
+                parts.append(f'"{token}"' + ("*" if prefix and i == len(tokens) - 1 else ""))
+    return " ".join(parts) or None
+
+
+def _render_snippet(snippet: Optional[str]) -> str:
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+search_index = SearchIndex()
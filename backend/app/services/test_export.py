@@ -1,5 +1,5 @@
 from .export_service import export_to_docx, export_to_pptx
-from ..workflows.graph import DEFAULT_GRAPH_CONFIG, graph
+from ..workflows.graph import DEFAULT_GRAPH_CONFIG, get_graph
 from ..workflows.state import SectionState
 
 
@@ -20,7 +20,7 @@ def generate_full_document(project_title: str, doc_type: str, outline: list):
             context_summary=f"Document Title: {project_title}"
         )
 
-        final_state = graph.invoke(state, config=DEFAULT_GRAPH_CONFIG)
+        final_state = get_graph().invoke(state, config=DEFAULT_GRAPH_CONFIG)
 
         full_content[section_title] = final_state["content"]
 
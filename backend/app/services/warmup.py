@@ -0,0 +1,64 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from . import llm_service
+from .export_templates import preload_templates
+from .metrics import metrics
+from ..workflows.graph import get_graph
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to skip background warm-up (heavy modules then load on first use)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") not in ("0", "false", "False")
+
+
+def _warm_llm_client():
+    if not llm_service.GENAI_API_KEY and llm_service.model is None:
+        return "skipped"
+    llm_service.get_model()
+
+
+class Warmup:
+    """
+    Loads the heavy, lazily-imported pieces (export templates, LangGraph workflow,
+    Gemini client) on a background thread after startup, so the server accepts
+    connections immediately and /ready reports when the first request will be fast.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable]]):
+        self.steps = steps
+        self.ready = threading.Event()
+        self.status: Dict[str, dict] = {}
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def run(self) -> None:
+        for name, step in self.steps:
+            start = time.perf_counter()
+            try:
+                outcome = "skipped" if step() == "skipped" else "ok"
+            except Exception as exc:
+                # a failed step only means that piece loads on first use instead
+                logger.exception("Warm-up step %s failed", name)
+                outcome = f"error: {exc}"
+            seconds = time.perf_counter() - start
+            metrics.observe("warmup_seconds", seconds, step=name)
+            self.status[name] = {"status": outcome, "seconds": round(seconds, 3)}
+        self.ready.set()
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready.is_set(), "steps": dict(self.status)}
+
+
+warmup = Warmup([
+    ("templates", preload_templates),
+    ("workflow", get_graph),
+    ("llm_client", _warm_llm_client),
+])
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import threading
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request, status
+
+from ..services.llm_executor import LLMQueueFull, llm_executor
+from ..services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds between client-disconnect checks while LLM work runs
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.25"))
+
+# nginx's "client closed request"; never seen by the client, but visible in access logs
+CLIENT_CLOSED_REQUEST = 499
+
+
+class OperationCancelled(Exception):
+    """
+    Raised inside worker code once the request it serves has been cancelled.
+    """
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        self.reason = reason
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+
+_current: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+def raise_if_cancelled() -> None:
+    """
+    Cancellation point for worker code (no-op outside run_cancellable).
+    """
+    token = _current.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def too_many_requests(exc: LLMQueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many generation requests in progress — try again shortly.",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _submit(call):
+    try:
+        return llm_executor.submit(call)
+    except LLMQueueFull as exc:
+        raise too_many_requests(exc)
+
+
+async def run_cancellable(request: Request, operation: str, fn, *args, **kwargs):
+    """
+    Run blocking `fn` on the LLM executor while watching for the client to go away.
+    On disconnect the token is cancelled, so the next cancellation point (every
+    LLM call) raises OperationCancelled; nothing after it, including the DB
+    writes at the end of `fn`, runs. Maps the cancellation to a 499, and a
+    full LLM executor to a 429 with Retry-After.
+    """
+    token = CancelToken()
+
+    def call():
+        reset = _current.set(token)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(reset)
+
+    async def watch():
+        while not token.cancelled:
+            if await request.is_disconnected():
+                token.cancel("client disconnected")
+                return
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+    future = _submit(call)
+    watcher = asyncio.ensure_future(watch())
+    try:
+        return await asyncio.wrap_future(future)
+    except OperationCancelled:
+        metrics.incr("llm_cancelled_total", operation=operation)
+        logger.info("%s cancelled: %s", operation, token.reason)
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    finally:
+        watcher.cancel()
+
+
+def iterate_cancellable(operation: str, fn, *args, **kwargs) -> AsyncIterator:
+    """
+    Run blocking `fn(emit, *args, **kwargs)` on the LLM executor and return an
+    async iterator over every item it passes to `emit`, as soon as it does
+    (streaming responses). Admission happens here, before any response is
+    started (429 when the executor is full). If the iterator is closed early,
+    e.g. the streaming client went away, the token is cancelled so `fn` stops
+    at its next cancellation point.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    token = CancelToken()
+    finished = object()
+
+    def emit(item) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def call():
+        reset = _current.set(token)
+        try:
+            return fn(emit, *args, **kwargs)
+        finally:
+            _current.reset(reset)
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    worker = asyncio.wrap_future(_submit(call))
+
+    async def items():
+        completed = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                yield item
+            completed = True
+            await worker   # surfaces an exception raised by fn
+        finally:
+            if not completed:
+                token.cancel("client disconnected")
+                # the worker still finishes (at its next cancellation point); nobody awaits it
+                worker.add_done_callback(lambda f: f.cancelled() or f.exception())
+                metrics.incr("llm_cancelled_total", operation=operation)
+                logger.info("%s cancelled: %s", operation, token.reason)
+
+    return items()
@@ -0,0 +1,60 @@
+import hashlib
+import json
+from typing import Any, Optional
+from urllib.parse import quote
+
+
+# ---------------------------------------------
+# ETag helpers
+# ---------------------------------------------
+def strong_etag(data: bytes) -> str:
+    """
+    Strong validator: changes whenever a single byte of the payload changes.
+    """
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def weak_etag(payload: Any) -> str:
+    """
+    Weak validator over a JSON-serialisable summary (ids, versions, ...), for
+    responses that are semantically - not byte-for-byte - identical.
+    """
+    raw = json.dumps(payload, separators=(",", ":"), default=str)
+    return 'W/"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+# Cached copies must be revalidated (If-None-Match) before every reuse
+REVALIDATE = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against `etag` (weak comparison, RFC 9110 §13.1.2).
+    """
+    if not if_none_match:
+        return False
+
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in candidates:
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
+
+
+# ---------------------------------------------
+# Content-Disposition
+# ---------------------------------------------
+def attachment_header(filename: str) -> str:
+    """
+    Build a Content-Disposition value the same way Starlette's FileResponse does.
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 from jose import jwt
 
+from .timing import timed
+
 # ---------------------------------------------
 # JWT CONFIG
 # ---------------------------------------------
@@ -39,7 +41,8 @@ def verify_access_token(token: str):
     Decodes the JWT token, validates signature + expiration.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with timed("auth"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload  # contains user_id, email, etc.
 
     except jwt.ExpiredSignatureError:
@@ -47,7 +50,7 @@ def verify_access_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired. Please login again."
         )
-    except jwt.InvalidTokenError:
+    except jwt.JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token."
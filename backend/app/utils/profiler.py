@@ -0,0 +1,133 @@
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Iterable, Optional
+
+from .timing import RequestTimings
+
+# Seconds between stack samples
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+# Per-request profiles kept for download
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "50"))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """
+    Pure-Python sampling profiler: a background thread snapshots the stacks of
+    the selected threads via sys._current_frames() and counts collapsed stacks.
+    The output is the "folded" format understood by flamegraph.pl, speedscope
+    and inferno (`frame;frame;frame count` per line).
+    """
+
+    def __init__(self, threads: Optional[Callable[[], Iterable[int]]] = None, interval: float = PROFILER_INTERVAL):
+        self._thread_filter = threads
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.folded()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            wanted = set(self._thread_filter()) if self._thread_filter else None
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (wanted is not None and tid not in wanted):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+def profile_window(seconds: float) -> str:
+    """
+    Profile every thread of the process for `seconds` and return folded stacks.
+    """
+    profiler = SamplingProfiler().start()
+    time.sleep(seconds)
+    return profiler.stop()
+
+
+class RequestProfiler:
+    """
+    Optional per-request profiling, toggled at runtime by an admin. Each sampled
+    request gets its own SamplingProfiler restricted to the threads that worked
+    on it; results are kept in a small LRU for download.
+    """
+
+    def __init__(self, max_profiles: int = PROFILER_MAX_PROFILES):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.path_prefix: Optional[str] = None
+        self.max_profiles = max_profiles
+        self.profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._running = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, sample_rate: float = 1.0, path_prefix: Optional[str] = None) -> None:
+        self.enabled = enabled
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.path_prefix = path_prefix
+
+    # hooks for ServerTimingMiddleware
+    def on_start(self, scope, timings: RequestTimings):
+        path = scope.get("path", "")
+        if not self.enabled or path.startswith("/admin/profiler"):
+            return None
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return None
+        if random.random() >= self.sample_rate:
+            return None
+
+        profile_id = f"{int(time.time())}-{next(self._ids)}"
+        profiler = SamplingProfiler(threads=lambda: list(timings.threads)).start()
+        with self._lock:
+            self._running[id(timings)] = (profile_id, profiler, scope.get("method", ""), path)
+        return {"X-Profile-Id": profile_id}
+
+    def on_finish(self, scope, timings: RequestTimings):
+        with self._lock:
+            running = self._running.pop(id(timings), None)
+        if running is None:
+            return
+        profile_id, profiler, method, path = running
+        folded = profiler.stop()
+        with self._lock:
+            self.profiles[profile_id] = {
+                "id": profile_id,
+                "method": method,
+                "path": path,
+                "duration_ms": round((time.perf_counter() - timings.started) * 1000, 1),
+                "samples": sum(profiler.samples.values()),
+                "folded": folded,
+            }
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+
+
+request_profiler = RequestProfiler()
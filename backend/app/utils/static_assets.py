@@ -0,0 +1,138 @@
+import gzip
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi.responses import FileResponse, Response
+
+from .http_cache import etag_matches, strong_etag
+
+try:  # optional: brotli variants are only produced/served when the package is installed
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Files above this size are served from disk (path known up front) instead of memory
+STATIC_MAX_INMEMORY_BYTES = 1024 * 1024
+# Smaller files are not worth compressing
+_MIN_COMPRESS_BYTES = 1024
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml",
+                       "application/xml", "application/wasm", "application/manifest+json")
+
+# Vite emits content-hashed file names under /assets, so they can be cached forever
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+DEFAULT_CACHE = "public, max-age=3600"
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    path: Path
+    media_type: str
+    etag: str
+    cache_control: str
+    body: Optional[bytes] = None                      # None → too large, served from `path`
+    encoded: Dict[str, bytes] = field(default_factory=dict)   # "br" / "gzip" → compressed body
+
+    def response(self, accept_encoding: Optional[str], if_none_match: Optional[str]) -> Response:
+        encoding = _pick_encoding(accept_encoding, self.encoded)
+        etag = self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if self.encoded:
+            headers["Vary"] = "Accept-Encoding"
+
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(content=self.encoded[encoding], media_type=self.media_type, headers=headers)
+        if self.body is None:
+            return FileResponse(self.path, media_type=self.media_type, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class StaticManifest:
+    """
+    In-memory index of the built frontend, created once at startup.
+    Lookups never touch the filesystem; precompressed variants are either picked
+    up from the build (<file>.br / <file>.gz) or generated during the scan.
+    """
+
+    def __init__(self, root: Path, assets: Dict[str, StaticAsset]):
+        self.root = root
+        self.assets = assets
+        self.index = assets.get("index.html")
+
+    @classmethod
+    def scan(cls, root: Path) -> "StaticManifest":
+        assets: Dict[str, StaticAsset] = {}
+        if root.is_dir():
+            files = {p.relative_to(root).as_posix(): p for p in root.rglob("*") if p.is_file()}
+            for rel, path in files.items():
+                if rel.endswith((".br", ".gz")) and rel[:-3] in files:
+                    continue  # precompressed sibling, attached to its original below
+                assets[rel] = _load_asset(rel, path, files)
+        return cls(root, assets)
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path.lstrip("/"))
+
+
+def _load_asset(rel: str, path: Path, files: Dict[str, Path]) -> StaticAsset:
+    media_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+        media_type += "; charset=utf-8"
+
+    if rel == "index.html":
+        cache_control = REVALIDATE_CACHE
+    elif rel.startswith("assets/"):
+        cache_control = IMMUTABLE_CACHE
+    else:
+        cache_control = DEFAULT_CACHE
+
+    stat = path.stat()
+    size = stat.st_size
+    if size > STATIC_MAX_INMEMORY_BYTES:
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        return StaticAsset(path=path, media_type=media_type, etag=etag, cache_control=cache_control)
+
+    body = path.read_bytes()
+    encoded: Dict[str, bytes] = {}
+    if rel + ".br" in files and brotli is not None:
+        encoded["br"] = files[rel + ".br"].read_bytes()
+    if rel + ".gz" in files:
+        encoded["gzip"] = files[rel + ".gz"].read_bytes()
+
+    if size >= _MIN_COMPRESS_BYTES and media_type.startswith(_COMPRESSIBLE_TYPES):
+        if "br" not in encoded and brotli is not None:
+            encoded["br"] = brotli.compress(body, quality=11)
+        if "gzip" not in encoded:
+            encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    # only keep variants that are actually smaller
+    encoded = {k: v for k, v in encoded.items() if len(v) < size}
+
+    return StaticAsset(path=path, media_type=media_type, etag=strong_etag(body),
+                       cache_control=cache_control, body=body, encoded=encoded)
+
+
+def _pick_encoding(accept_encoding: Optional[str], available: Dict[str, bytes]) -> Optional[str]:
+    if not accept_encoding or not available:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
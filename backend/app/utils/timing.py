@@ -0,0 +1,142 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+
+class RequestTimings:
+    """
+    Per-request accumulator of time spent in named phases (auth, db, llm, ...).
+    Shared by every thread that works on the request, hence the lock.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, list] = {}          # phase -> [seconds, count]
+        self.threads = {threading.get_ident()}     # threads seen working on this request
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.phases.setdefault(phase, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+            self.threads.add(threading.get_ident())
+
+    def header(self) -> str:
+        """
+        Server-Timing header value, e.g. `auth;dur=1.2, db;dur=3.4;desc="5 calls", total;dur=9.9`.
+        """
+        with self._lock:
+            parts = [
+                f'{phase};dur={seconds * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"'
+                for phase, (seconds, count) in self.phases.items()
+            ]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+_active_phases: ContextVar[frozenset] = ContextVar("active_timing_phases", default=frozenset())
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Attribute the wrapped block to `phase` of the current request (no-op outside
+    a request). Nested blocks of the same phase are only counted once.
+    Also usable as a decorator.
+    """
+    timings = _current.get()
+    active = _active_phases.get()
+    if timings is None or phase in active:
+        yield
+        return
+
+    token = _active_phases.set(active | {phase})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+        _active_phases.reset(token)
+
+
+# ---------------------------------------------
+# SQLAlchemy hook
+# ---------------------------------------------
+def install_db_timing(engine) -> None:
+    """
+    Attribute every statement executed on `engine` to the "db" phase.
+    """
+    local = threading.local()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        local.start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _current.get()
+        start = getattr(local, "start", None)
+        if timings is not None and start is not None:
+            timings.add("db", time.perf_counter() - start)
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    Default response class: attributes JSON rendering to the "serialize" phase.
+    """
+
+    def render(self, content) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+# ---------------------------------------------
+# ASGI middleware
+# ---------------------------------------------
+class ServerTimingMiddleware:
+    """
+    Collects RequestTimings for each HTTP request and returns them in a
+    `Server-Timing` response header. Optional `on_start` / `on_finish` hooks
+    let the profiler attach to the same request lifecycle.
+    """
+
+    def __init__(self, app, on_start=None, on_finish=None):
+        self.app = app
+        self.on_start = on_start
+        self.on_finish = on_finish
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        extra_headers = self.on_start(scope, timings) if self.on_start else None
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                for name, value in (extra_headers or {}).items():
+                    headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if self.on_finish:
+                self.on_finish(scope, timings)
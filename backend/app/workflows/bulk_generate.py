@@ -0,0 +1,366 @@
+"""
+Generate many documents from a JSONL manifest, unattended.
+
+Each manifest line describes one document:
+    {"title": "Q3 Review", "doc_type": "docx", "outline": ["Summary", "Results"],
+     "context": "optional notes for every section", "id": "optional stable key"}
+
+Sections run through the same LangGraph workflow as the API. Results go to the
+database (a project owned by --owner-email, with revisions) or straight to
+DOCX/PPTX files in --out-dir. Every finished document is appended to a progress
+file, so re-running the same command skips it; a document interrupted half-way
+resumes with its pending sections (database output).
+
+Run from backend/:
+    python -m app.workflows.bulk_generate manifest.jsonl --owner-email me@example.com --parallel 8
+    python -m app.workflows.bulk_generate manifest.jsonl --output files --out-dir exports/
+"""
+import argparse
+import contextvars
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from ..db import SessionLocal, init_db
+from ..models.project import Project
+from ..models.revision import Revision
+from ..models.section import Section
+from ..models.user import User
+from ..services.eval_batcher import evaluation_batcher
+from ..services.export_service import render_export
+from ..services.llm_scheduler import Priority, llm_context
+from ..services.llm_service import build_project_context
+from .graph import DEFAULT_GRAPH_CONFIG, get_graph
+from .state import SectionState
+
+DOC_TYPES = ("docx", "pptx")
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def parse_entry(line: str) -> dict:
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise ManifestError(f"invalid JSON: {exc}")
+    if not isinstance(entry, dict):
+        raise ManifestError("entry must be a JSON object")
+    if not isinstance(entry.get("title"), str) or not entry["title"].strip():
+        raise ManifestError("'title' must be a non-empty string")
+    if entry.get("doc_type") not in DOC_TYPES:
+        raise ManifestError("'doc_type' must be 'docx' or 'pptx'")
+    outline = entry.get("outline")
+    if not isinstance(outline, list) or not outline or not all(isinstance(t, str) and t.strip() for t in outline):
+        raise ManifestError("'outline' must be a non-empty list of section titles")
+    return entry
+
+
+def entry_key(entry: dict) -> str:
+    """
+    Stable identity of a manifest entry: its "id", or a hash of its content.
+    """
+    if entry.get("id") is not None:
+        return str(entry["id"])
+    canonical = json.dumps(
+        {k: entry.get(k) for k in ("title", "doc_type", "outline", "context")}, sort_keys=True
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# ---------------------------------------------
+# Progress file
+# ---------------------------------------------
+class ProgressLog:
+    """
+    Append-only JSONL record of document outcomes; the last record per key wins.
+    Each line is flushed and fsynced, so a crash loses at most the document in flight.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue   # torn last line from an interrupted run
+                    self.records[record["key"]] = record
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def done(self, key: str) -> bool:
+        return self.records.get(key, {}).get("status") == "done"
+
+    def record(self, key: str, status: str, **fields) -> None:
+        record = {"key": key, "status": status, **fields}
+        with self._lock:
+            self.records[key] = record
+            self._fh.write(json.dumps(record) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+# ---------------------------------------------
+# Generation
+# ---------------------------------------------
+def _run_section(state: SectionState):
+    result = get_graph().invoke(state, config=DEFAULT_GRAPH_CONFIG)
+    if isinstance(result, dict):
+        return result.get("content"), result.get("version", state.version), result.get("score")
+    return result.content, result.version, result.score
+
+
+def _generate_into_db(entry: dict, key: str, owner: User, progress: ProgressLog) -> dict:
+    db = SessionLocal()
+    try:
+        previous = progress.records.get(key, {})
+        project = None
+        if previous.get("project_id"):
+            project = db.query(Project).filter(
+                Project.id == previous["project_id"], Project.owner_id == owner.id
+            ).first()
+        if project is None:
+            project = Project(title=entry["title"], doc_type=entry["doc_type"], owner_id=owner.id)
+            db.add(project)
+            db.flush()
+            created = [Section(project_id=project.id, title=title, status="pending") for title in entry["outline"]]
+            db.add_all(created)
+            db.flush()
+            # recorded before the commit, so an interruption can't leave a project the
+            # progress file doesn't know about; _drop_unverified_starts checks it on resume
+            progress.record(key, "started", project_id=project.id, section_ids=[sec.id for sec in created])
+            db.commit()
+
+        sections = db.query(Section).filter(Section.project_id == project.id).order_by(Section.id).all()
+        project_context = build_project_context(project.title, [s.title for s in sections])
+        generated = 0
+        for sec in sections:
+            if sec.status == "generated":
+                continue
+            content, version, score = _run_section(SectionState(
+                section_id=sec.id,
+                section_title=sec.title,
+                doc_type=project.doc_type,
+                context_summary=entry.get("context"),
+                project_id=project.id,
+                project_context=project_context,
+                batch_evaluation=True,
+            ))
+            sec.content = content
+            sec.version = version
+            sec.status = "generated"
+            db.add(Revision(section_id=sec.id, version=version, content=content, score=score))
+            db.commit()
+            generated += 1
+        return {"project_id": project.id, "sections": generated}
+    finally:
+        db.close()
+
+
+def _filename_key(key: str) -> str:
+    # manifest ids are free text: keep them out of path separators and "..",
+    # and tell apart ids that only differ in the characters replaced
+    safe = re.sub(r"[^A-Za-z0-9]+", "-", key).strip("-")[:40]
+    if safe == key:
+        return key
+    return f"{safe}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}".lstrip("-")
+
+
+def _generate_into_file(entry: dict, key: str, out_dir: str) -> dict:
+    # no project row to key the prompt-prefix cache on: the outline goes into the section notes
+    notes = build_project_context(entry["title"], entry["outline"])
+    if entry.get("context"):
+        notes += "\n\n" + entry["context"]
+    sections = {}
+    for index, title in enumerate(entry["outline"], start=1):
+        content, _, _ = _run_section(SectionState(
+            section_id=index,
+            section_title=title,
+            doc_type=entry["doc_type"],
+            context_summary=notes,
+            batch_evaluation=True,
+        ))
+        sections[title] = content
+
+    data = render_export(entry["doc_type"], entry["title"], sections)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", entry["title"]).strip("-")[:60] or "document"
+    path = os.path.join(out_dir, f"{slug}-{_filename_key(key)}.{entry['doc_type']}")
+    tmp = path + ".part"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    return {"path": path, "sections": len(sections)}
+
+
+def _process(entry: dict, key: str, args, owner: Optional[User], progress: ProgressLog) -> dict:
+    started = time.perf_counter()
+    with evaluation_batcher.participant():
+        if args.output == "db":
+            outcome = _generate_into_db(entry, key, owner, progress)
+        else:
+            outcome = _generate_into_file(entry, key, args.out_dir)
+    outcome["seconds"] = round(time.perf_counter() - started, 3)
+    return outcome
+
+
+# ---------------------------------------------
+# CLI
+# ---------------------------------------------
+def _load_manifest(path: str, progress: ProgressLog):
+    entries, invalid, skipped = [], [], 0
+    seen = set()
+    with open(path, encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = parse_entry(line)
+            except ManifestError as exc:
+                invalid.append((line_no, str(exc)))
+                continue
+            key = entry_key(entry)
+            if key in seen or progress.done(key):
+                skipped += 1
+                continue
+            seen.add(key)
+            entries.append((key, entry))
+    return entries, invalid, skipped
+
+
+def _is_recorded_project(db, record: dict, entry: dict, owner: User) -> bool:
+    project = db.query(Project).filter(Project.id == record["project_id"], Project.owner_id == owner.id).first()
+    if project is None or (project.title, project.doc_type) != (entry["title"], entry["doc_type"]):
+        return False
+    if record.get("section_ids") is None:
+        return True   # progress file written before section ids were recorded
+    section_ids = [sid for (sid,) in db.query(Section.id).filter(Section.project_id == project.id).order_by(Section.id)]
+    return section_ids == record["section_ids"]
+
+
+def _drop_unverified_starts(entries, owner: User, progress: ProgressLog) -> int:
+    """
+    "started" is recorded just before the project commit, so after a crash it can
+    name rows that were never written - and SQLite may since have reused their ids.
+    Runs before this run inserts anything; entries whose recorded project isn't
+    exactly the one we created start over.
+    """
+    dropped = 0
+    db = SessionLocal()
+    try:
+        for key, entry in entries:
+            record = progress.records.get(key, {})
+            if record.get("project_id") and not _is_recorded_project(db, record, entry, owner):
+                progress.record(key, "reset", title=entry["title"])
+                dropped += 1
+    finally:
+        db.close()
+    return dropped
+
+
+def _summary(results: List[dict], failed: int, skipped: int, invalid: int, wall: float) -> str:
+    sections = sum(r["sections"] for r in results)
+    minutes = wall / 60 if wall else 0
+    lines = [
+        "",
+        f"documents   {len(results)} done, {failed} failed, {skipped} skipped (already done), {invalid} invalid",
+        f"sections    {sections} generated",
+        f"wall time   {wall:.1f}s",
+    ]
+    if results and minutes:
+        durations = sorted(r["seconds"] for r in results)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        lines += [
+            f"throughput  {len(results) / minutes:.1f} documents/min, {sections / minutes:.1f} sections/min",
+            f"per doc     p50 {statistics.median(durations):.1f}s, p95 {p95:.1f}s, max {durations[-1]:.1f}s",
+        ]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="JSONL file, one document per line")
+    parser.add_argument("--output", choices=("db", "files"), default="db")
+    parser.add_argument("--owner-email", help="owner of the created projects (--output db)")
+    parser.add_argument("--out-dir", default="bulk_output", help="where documents are written (--output files)")
+    parser.add_argument("--parallel", type=int, default=4,
+                        help="documents generated at once (Gemini calls are still capped by LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--progress", help="progress file (default: <manifest>.progress.jsonl)")
+    parser.add_argument("--limit", type=int, help="stop after this many documents")
+    args = parser.parse_args(argv)
+
+    owner = None
+    if args.output == "db":
+        if not args.owner_email:
+            parser.error("--owner-email is required with --output db")
+        init_db()
+        db = SessionLocal()
+        owner = db.query(User).filter(User.email == args.owner_email).first()
+        db.close()
+        if owner is None:
+            parser.error(f"no user with email {args.owner_email}")
+    else:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    progress = ProgressLog(args.progress or args.manifest + ".progress.jsonl")
+    entries, invalid, skipped = _load_manifest(args.manifest, progress)
+    for line_no, error in invalid:
+        print(f"manifest line {line_no}: {error}", file=sys.stderr)
+    if args.limit is not None:
+        entries = entries[:args.limit]
+    if owner is not None:
+        dropped = _drop_unverified_starts(entries, owner, progress)
+        if dropped:
+            print(f"{dropped} interrupted documents had no saved project; starting them over", file=sys.stderr)
+    print(f"{len(entries)} documents to generate ({skipped} already done) with {args.parallel} in parallel")
+
+    results, failed = [], 0
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=max(1, args.parallel), thread_name_prefix="bulk-generate")
+    try:
+        with llm_context(owner.id if owner else "bulk-cli", Priority.BULK):
+            futures = {
+                pool.submit(contextvars.copy_context().run, _process, entry, key, args, owner, progress): (key, entry)
+                for key, entry in entries
+            }
+            for n, future in enumerate(as_completed(futures), start=1):
+                key, entry = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as exc:
+                    failed += 1
+                    previous = progress.records.get(key, {})
+                    progress.record(key, "failed", title=entry["title"], error=f"{type(exc).__name__}: {exc}",
+                                    project_id=previous.get("project_id"), section_ids=previous.get("section_ids"))
+                    print(f"[{n}/{len(entries)}] FAILED {entry['title']!r}: {exc}", file=sys.stderr)
+                    continue
+                progress.record(key, "done", title=entry["title"], **outcome)
+                results.append(outcome)
+                print(f"[{n}/{len(entries)}] done {entry['title']!r} "
+                      f"({outcome['sections']} sections, {outcome['seconds']:.1f}s)")
+    except KeyboardInterrupt:
+        print("\ninterrupted; finished documents are recorded, re-run to continue", file=sys.stderr)
+        pool.shutdown(wait=False, cancel_futures=True)
+    finally:
+        pool.shutdown(wait=True)
+        progress.close()
+
+    print(_summary(results, failed, skipped, len(invalid), time.perf_counter() - started))
+    return 1 if failed or invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
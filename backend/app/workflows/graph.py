@@ -1,8 +1,13 @@
-from langgraph.graph import END, StateGraph
+import threading
 
 from .nodes import evaluate_content, generate_content, refine_content
 from .state import SectionState
 
+DEFAULT_GRAPH_CONFIG = {"recursion_limit": 100}
+
+# LangGraph's END sentinel; kept as a literal so this module imports without langgraph
+END = "__end__"
+
 
 def decision_router(state: SectionState):
     # Stop if user liked the result
@@ -25,27 +30,51 @@ def decision_router(state: SectionState):
     return END
 
 
-workflow = StateGraph(SectionState)
+def build_graph():
+    from langgraph.graph import StateGraph
 
-workflow.add_node("generate_content", generate_content)
-workflow.add_node("evaluate_content", evaluate_content)
-workflow.add_node("refine_content", refine_content)
+    workflow = StateGraph(SectionState)
 
-workflow.set_entry_point("generate_content")
+    workflow.add_node("generate_content", generate_content)
+    workflow.add_node("evaluate_content", evaluate_content)
+    workflow.add_node("refine_content", refine_content)
 
-workflow.add_edge("generate_content", "evaluate_content")
+    workflow.set_entry_point("generate_content")
 
-workflow.add_conditional_edges(
-    "evaluate_content",
-    decision_router,
-    {
-        "refine_content": "refine_content",
-        END: END
-    }
-)
+    workflow.add_edge("generate_content", "evaluate_content")
 
-workflow.add_edge("refine_content", "evaluate_content")
+    workflow.add_conditional_edges(
+        "evaluate_content",
+        decision_router,
+        {
+            "refine_content": "refine_content",
+            END: END
+        }
+    )
 
-graph = workflow.compile()
+    workflow.add_edge("refine_content", "evaluate_content")
 
-DEFAULT_GRAPH_CONFIG = {"recursion_limit": 100}
+    return workflow.compile()
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """
+    Compiled workflow, built on first use (or by the startup warm-up).
+    """
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+
+def __getattr__(name):
+    # keeps `from .graph import graph` working without compiling at import time
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,7 @@
 from .state import SectionState
+from ..utils.timing import timed
+from ..services.eval_batcher import evaluation_batcher
+from ..services.progress import node_progress, publish_section
 from ..services.llm_service import (
     llm_evaluate,
     llm_generate_section,
@@ -7,6 +10,7 @@ from ..services.llm_service import (
 )
 
 # ✅ NEW — refine user outline BEFORE content generation
+@timed("node_refine_outline")
 def refine_outline(state: SectionState) -> SectionState:
     if not state.raw_outline:
         return state  # nothing to refine
@@ -20,22 +24,34 @@ def refine_outline(state: SectionState) -> SectionState:
 
 
 # ✅ Node 1 — generate content based on section title + doc type
+@timed("node_generate")
+@node_progress("generate")
 def generate_content(state: SectionState) -> SectionState:
     state.content = llm_generate_section(
         section_title=state.section_title,
         doc_type=state.doc_type,
-        context_summary=state.context_summary or ""
+        context_summary=state.context_summary or "",
+        project_context=state.project_context,
+        project_key=state.project_id,
     )
     return state
 
 # ✅ Node 2 — evaluate and store improvement direction
+@timed("node_evaluate")
+@node_progress("evaluate")
 def evaluate_content(state: SectionState) -> SectionState:
-    result = llm_evaluate(state.content)
+    if state.batch_evaluation:
+        result = evaluation_batcher.evaluate(state.content)
+    else:
+        result = llm_evaluate(state.content)
     state.score = result["score"]
     state.user_prompt = result["improvement_focus"]
+    publish_section(state, "score", score=state.score, version=state.version)
     return state
 
 # ✅ Node 3 — refine based on detected issues or user dislike
+@timed("node_refine")
+@node_progress("refine")
 def refine_content(state: SectionState) -> SectionState:
     state.content = llm_refine(
         content=state.content,
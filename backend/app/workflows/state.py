@@ -20,3 +20,13 @@ class SectionState(BaseModel):
     max_attempts: int = 3
     user_prompt: Optional[str] = None
     context_summary: Optional[str] = None
+
+    # project-wide context, sent as a cached prompt prefix shared by all sections
+    project_id: Optional[int] = None
+    project_context: Optional[str] = None
+
+    # evaluate together with other sections running at the same time (project generation)
+    batch_evaluation: bool = False
+
+    # publish node/score events to the project's progress channel (project generation only)
+    report_progress: bool = False
@@ -1,4 +1,4 @@
-from .graph import DEFAULT_GRAPH_CONFIG, graph
+from .graph import DEFAULT_GRAPH_CONFIG, get_graph
 from .state import SectionState
 
 
@@ -40,7 +40,7 @@ def run_full_document_test():
             context_summary=f"Document Title: {title}",
         )
 
-        final_state = graph.invoke(state, config=DEFAULT_GRAPH_CONFIG)
+        final_state = get_graph().invoke(state, config=DEFAULT_GRAPH_CONFIG)
 
         full_document[section_title] = final_state["content"]
 
@@ -0,0 +1,296 @@
+"""
+End-to-end API benchmark against the real FastAPI app with a simulated LLM.
+
+Each virtual user runs the full workflow: register/login, create project,
+submit outline, generate, refine (like / dislike / generate) and export.
+Gemini is replaced by a local model with configurable latency, and the app
+runs in-process against a throwaway SQLite database.
+
+Run from backend/:
+    python -m benchmarks.api_bench --users 8 --sections 6 --llm-latency-ms 150
+    python -m benchmarks.api_bench --users 8 --compare bench_results/previous.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+_EVAL_MARKER = "JSON response format"
+_BATCH_EVAL_MARKER = "JSON array response format"
+
+
+class SimulatedResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class SimulatedModel:
+    """
+    Stand-in for genai.GenerativeModel: sleeps for the configured latency and
+    returns plausible text (or evaluation JSON) without network access.
+    """
+
+    def __init__(self, latency_ms: float, jitter_ms: float, low_score_ratio: float, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.low_score_ratio = low_score_ratio
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, prompt, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            low = self._rng.random() < self.low_score_ratio
+        time.sleep(delay)
+
+        if _BATCH_EVAL_MARKER in str(prompt):
+            count = len(re.findall(r"^\s*Section \d+:", str(prompt), re.MULTILINE))
+            entries = [
+                {"section": i + 1, "score": 6.5 if low else 8.5, "improvement_focus": "Tighten the structure."}
+                for i in range(count)
+            ]
+            return SimulatedResponse(json.dumps(entries))
+        if _EVAL_MARKER in str(prompt):
+            score = 6.5 if low else 8.5
+            return SimulatedResponse(json.dumps({"score": score, "improvement_focus": "Tighten the structure."}))
+        words = " ".join(f"word{i}" for i in range(200))
+        return SimulatedResponse(f"Simulated section text. {words}")
+
+
+# ---------------------------------------------------
+# Measurement
+# ---------------------------------------------------
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+
+class DbWaitProbe:
+    """
+    Times write statements and COMMITs on the engine; with SQLite these block on
+    the database lock, so their latency is the lock wait seen by the app.
+    """
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self._lock = threading.Lock()
+        self.write_waits = []
+        self.commit_waits = []
+        self.locked_errors = 0
+        self._local = threading.local()
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            self._local.start = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+                with self._lock:
+                    self.write_waits.append(time.perf_counter() - self._local.start)
+
+        @event.listens_for(engine, "commit")
+        def _commit(conn):
+            self._local.commit_start = time.perf_counter()
+
+        @event.listens_for(engine, "handle_error")
+        def _error(ctx):
+            if "database is locked" in str(ctx.original_exception):
+                with self._lock:
+                    self.locked_errors += 1
+
+        from sqlalchemy.orm import Session
+
+        @event.listens_for(Session, "after_commit")
+        def _after_commit(session):
+            start = getattr(self._local, "commit_start", None)
+            if start is not None:
+                with self._lock:
+                    self.commit_waits.append(time.perf_counter() - start)
+                self._local.commit_start = None
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+# ---------------------------------------------------
+# Workload
+# ---------------------------------------------------
+def _call(client, recorder, name, method, url, expected=(200, 201), **kwargs):
+    start = time.perf_counter()
+    response = client.request(method, url, **kwargs)
+    recorder.record(name, time.perf_counter() - start, response.status_code in expected)
+    return response
+
+
+def run_user(app, user_idx: int, args, recorder: Recorder):
+    from fastapi.testclient import TestClient
+
+    # lifespan (startup/shutdown) is driven once by run_benchmark, not per user
+    client = TestClient(app)
+    email = f"bench{user_idx}_{int(time.time() * 1000)}@example.com"
+    _call(client, recorder, "POST /auth/register", "POST", "/auth/register",
+          json={"email": email, "password": "bench-pass-1"})
+    token = _call(client, recorder, "POST /auth/login", "POST", "/auth/login",
+                  data={"username": email, "password": "bench-pass-1"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    project = _call(client, recorder, "POST /projects/", "POST", "/projects/", headers=headers,
+                    json={"title": f"Bench project {user_idx}", "doc_type": "docx"}).json()
+    pid = project["id"]
+    outline = [f"Section {i + 1}" for i in range(args.sections)]
+    sections = _call(client, recorder, "POST /projects/{id}/outline", "POST", f"/projects/{pid}/outline",
+                     headers=headers, json={"sections": outline}).json()["sections"]
+
+    _call(client, recorder, "POST /projects/{id}/generate", "POST", f"/projects/{pid}/generate", headers=headers)
+    _call(client, recorder, "GET /projects/{id}/sections", "GET", f"/projects/{pid}/sections", headers=headers)
+
+    for sec in sections[: args.refine_sections]:
+        url = f"/sections/{sec['id']}/refine"
+        for feedback in ("like", "dislike", "generate"):
+            _call(client, recorder, f"POST /sections/{{id}}/refine [{feedback}]", "POST", url, headers=headers,
+                  json={"feedback": feedback, "user_prompt": "Make it crisper."})
+
+    for fmt in ("docx", "pptx"):
+        _call(client, recorder, f"GET /projects/{{id}}/export [{fmt}]", "GET",
+              f"/projects/{pid}/export?type={fmt}", headers=headers)
+
+
+def run_benchmark(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="ai_doc_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir) / 'bench.db'}"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    from app.db import engine
+    from app.main import app
+    from app.services import llm_service
+
+    model = SimulatedModel(args.llm_latency_ms, args.llm_jitter_ms, args.low_score_ratio)
+    llm_service.model = model
+    probe = DbWaitProbe(engine)
+    recorder = Recorder()
+
+    from fastapi.testclient import TestClient
+
+    with TestClient(app):  # runs startup/shutdown hooks once
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run_user, args=(app, i, args, recorder)) for i in range(args.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+    total_requests = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": vars(args),
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "requests_per_s": round(total_requests / elapsed, 3),
+            "workflows_per_s": round(args.users / elapsed, 3),
+            "requests": total_requests,
+            "errors": sum(recorder.errors.values()),
+        },
+        "endpoints": {
+            name: {**_percentiles(samples), "errors": recorder.errors.get(name, 0)}
+            for name, samples in sorted(recorder.latencies.items())
+        },
+        "db": {
+            "write_statements": _percentiles(probe.write_waits),
+            "commits": _percentiles(probe.commit_waits),
+            "locked_errors": probe.locked_errors,
+        },
+        "llm_calls": model.calls,
+    }
+
+
+# ---------------------------------------------------
+# Reporting
+# ---------------------------------------------------
+def print_report(result: dict, baseline: dict = None):
+    t = result["throughput"]
+    print(f"\n{t['requests']} requests in {result['elapsed_s']}s  "
+          f"({t['requests_per_s']} req/s, {t['workflows_per_s']} workflows/s, {t['errors']} errors, "
+          f"{result['llm_calls']} LLM calls)\n")
+    print(f"{'endpoint':<40} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'err':>5}")
+    for name, s in result["endpoints"].items():
+        line = f"{name:<40} {s['count']:>5} {s['p50_ms']:>10.1f} {s['p95_ms']:>10.1f} {s['p99_ms']:>10.1f} {s['errors']:>5}"
+        old = (baseline or {}).get("endpoints", {}).get(name)
+        if old and old.get("p95_ms"):
+            line += f"   p95 {((s['p95_ms'] - old['p95_ms']) / old['p95_ms']) * 100:+.1f}%"
+        print(line)
+
+    db = result["db"]
+    for label, key in (("db write statements", "write_statements"), ("db commits", "commits")):
+        s = db[key]
+        if s["count"]:
+            print(f"{label:<40} {s['count']:>5} {s['p50_ms']:>10.1f} {s['p95_ms']:>10.1f} {s['p99_ms']:>10.1f}")
+    print(f"{'db locked errors':<40} {db['locked_errors']:>5}")
+
+    if baseline:
+        old = baseline["throughput"]["requests_per_s"]
+        print(f"\nthroughput vs baseline: {((t['requests_per_s'] - old) / old) * 100:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4, help="concurrent virtual users")
+    parser.add_argument("--sections", type=int, default=5, help="outline sections per project")
+    parser.add_argument("--refine-sections", type=int, default=2, help="sections refined per user")
+    parser.add_argument("--llm-latency-ms", type=float, default=100.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=25.0)
+    parser.add_argument("--low-score-ratio", type=float, default=0.3,
+                        help="share of evaluations scoring below the refine threshold")
+    parser.add_argument("--out", default=None, help="results JSON (default: bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+
+    out = Path(args.out or Path("bench_results") / f"api_bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(result, baseline)
+    print(f"\nresults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
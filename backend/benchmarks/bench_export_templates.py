@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: per-export setup cost of Document()/Presentation() versus the
+preloaded template cache in app.services.export_templates.
+
+Run from backend/:
+    python -m benchmarks.bench_export_templates --iterations 200
+"""
+import argparse
+import statistics
+import time
+
+from docx import Document
+from pptx import Presentation
+
+from app.services.export_templates import templates
+
+
+def _time_per_call(fn, iterations: int) -> dict:
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    templates.preload()
+    print(f"one-time preload: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    cases = [
+        ("docx", "Document() from disk", Document),
+        ("docx", "template cache copy", lambda: templates.new("docx")),
+        ("pptx", "Presentation() from disk", Presentation),
+        ("pptx", "template cache copy", lambda: templates.new("pptx")),
+    ]
+
+    print(f"{'format':<6} {'setup':<26} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    baseline = {}
+    for fmt, label, fn in cases:
+        result = _time_per_call(fn, args.iterations)
+        speedup = ""
+        if fmt in baseline:
+            speedup = f"  ({baseline[fmt] / result['mean_ms']:.1f}x faster)"
+        else:
+            baseline[fmt] = result["mean_ms"]
+        print(f"{fmt:<6} {label:<26} {result['mean_ms']:>9.2f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
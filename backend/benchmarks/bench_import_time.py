@@ -0,0 +1,85 @@
+"""
+Cold-start check: time `import app.main` in fresh interpreters and fail when it
+exceeds a budget or when a heavy dependency is imported eagerly again.
+
+Run from backend/:
+    python -m benchmarks.bench_import_time --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Must stay out of the import path of app.main; they load on first use / during warm-up
+LAZY_MODULES = ("google.generativeai", "google.api_core", "langgraph", "docx", "pptx")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _env():
+    env = dict(os.environ)
+    env.pop("GENAI_API_KEY", None)  # the app must import without credentials
+    return env
+
+
+def measure_once() -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, env=_env(), check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(limit: int) -> list:
+    """
+    Slowest top-level imports under app.main, from `python -X importtime`.
+    """
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                         capture_output=True, text=True, env=_env(), check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match and len(match.group(3)) <= 3:   # direct children of app.main
+            rows.append((int(match.group(2)) / 1000, match.group(4)))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="fail if the median import exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    samples = sorted(r["ms"] for r in runs)
+    median = statistics.median(samples)
+    print(f"import app.main: median {median:.0f} ms, min {samples[0]:.0f} ms, max {samples[-1]:.0f} ms "
+          f"({args.runs} runs, budget {args.budget_ms:.0f} ms)\n")
+
+    print(f"{'cumulative ms':>14}  module")
+    for ms, module in top_imports(args.top):
+        print(f"{ms:>14.1f}  {module}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+    eager = sorted({m for r in runs for m in r["loaded"]})
+    if eager:
+        failures.append(f"heavy modules imported eagerly: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Prompt bytes per section with and without the project-scoped prefix cache.
+
+Generates every section of a synthetic project through llm_generate_section
+against a counting stand-in model: once with the old all-inline prompt, once
+with the shared prefix registered in LocalPromptCache.
+
+Run from backend/:
+    python -m benchmarks.bench_prompt_prefix --sections 40 --context-kb 32
+"""
+import argparse
+
+from app.services import llm_service
+from app.services.metrics import metrics
+from app.services.prompt_cache import LocalPromptCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, *args, **kwargs):
+        self.calls += 1
+        return type("Response", (), {"text": "Simulated section text."})()
+
+
+def _sent_bytes() -> float:
+    return metrics.counter_value("llm_prompt_bytes_sent_total")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--context-kb", type=float, default=32.0, help="size of the project context")
+    args = parser.parse_args()
+
+    llm_service.model = CountingModel()
+    llm_service.prompt_cache = LocalPromptCache(min_bytes=0)
+
+    titles = [f"Section {i + 1}" for i in range(args.sections)]
+    filler = "Background material shared by the whole project. " * int(args.context_kb * 1024 / 50)
+    context = llm_service.build_project_context("Benchmark project", titles) + "\n\n" + filler
+
+    results = {}
+    for label, use_prefix in (("inline prompt", False), ("cached prefix", True)):
+        metrics.reset()
+        for title in titles:
+            if use_prefix:
+                llm_service.llm_generate_section(title, "docx", "", project_context=context, project_key=1)
+            else:
+                llm_service.llm_generate_section(title, "docx", context)
+        results[label] = _sent_bytes() / args.sections
+
+    print(f"{args.sections} sections, {len(context.encode()) / 1024:.1f} KiB project context\n")
+    for label, per_section in results.items():
+        print(f"{label:<14} {per_section / 1024:>10.1f} KiB sent per section")
+    print(f"\nreduction: {(1 - results['cached prefix'] / results['inline prompt']) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Full-text search latency over a large synthetic corpus.
+
+Fills a temporary SQLite DB with users, projects, sections and revisions,
+builds the FTS5 index (the same 'rebuild' backfill init runs on an existing
+DB), then times SearchIndex.search for rare, common, phrase and prefix queries
+of one user, with and without revisions.
+
+Run from backend/:
+    python -m benchmarks.bench_search --users 50 --revisions 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import project, revision, section, user  # noqa: F401  (register tables)
+from app.services.search_index import SearchIndex
+
+WORDS = (
+    "roadmap budget customer pipeline migration onboarding latency revenue quarterly strategy "
+    "compliance vendor analytics retention hiring platform release security feedback forecast"
+).split()
+
+QUERIES = [
+    ("common word", "strategy"),
+    ("two words", "budget forecast"),
+    ("phrase", '"customer onboarding"'),
+    ("prefix", "migr*"),
+    ("rare word", "xylophone"),
+]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _fill(engine, users: int, sections_per_user: int, revisions: int, words: int, rng: random.Random):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (:id, :email, 'x')"),
+                     [{"id": u, "email": f"user{u}@example.com"} for u in range(1, users + 1)])
+        conn.execute(text("INSERT INTO projects (id, title, doc_type, owner_id) VALUES (:id, :title, 'docx', :id)"),
+                     [{"id": u, "title": f"Project {u}"} for u in range(1, users + 1)])
+        section_rows = [
+            {"id": s, "project_id": (s - 1) // sections_per_user + 1, "title": f"Section {s}",
+             "content": _text(rng, words)}
+            for s in range(1, users * sections_per_user + 1)
+        ]
+        section_rows[0]["content"] += " xylophone"
+        conn.execute(text("INSERT INTO sections (id, project_id, title, content, version, status) "
+                          "VALUES (:id, :project_id, :title, :content, 1, 'generated')"), section_rows)
+        batch = []
+        for r in range(1, revisions + 1):
+            batch.append({"section_id": rng.randint(1, len(section_rows)), "version": r, "content": _text(rng, words)})
+            if len(batch) == 10000:
+                conn.execute(text("INSERT INTO revisions (section_id, version, content) VALUES (:section_id, :version, :content)"), batch)
+                batch = []
+        if batch:
+            conn.execute(text("INSERT INTO revisions (section_id, version, content) VALUES (:section_id, :version, :content)"), batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sections-per-user", type=int, default=40)
+    parser.add_argument("--revisions", type=int, default=200000)
+    parser.add_argument("--words", type=int, default=200, help="words per section / revision")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        Base.metadata.create_all(bind=engine)
+
+        started = time.perf_counter()
+        _fill(engine, args.users, args.sections_per_user, args.revisions, args.words, random.Random(7))
+        print(f"filled {args.users * args.sections_per_user} sections, {args.revisions} revisions "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        index = SearchIndex()
+        started = time.perf_counter()
+        index.install(engine)
+        print(f"built index in {time.perf_counter() - started:.1f}s\n")
+
+        db = sessionmaker(bind=engine)()
+        print(f"{'query':<14}{'revisions':>10}{'p50 ms':>10}{'max ms':>10}")
+        for label, query in QUERIES:
+            for include_revisions in (False, True):
+                durations = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    index.search(db, 1, query, include_revisions=include_revisions, limit=20)
+                    durations.append((time.perf_counter() - started) * 1000)
+                print(f"{label:<14}{'yes' if include_revisions else 'no':>10}"
+                      f"{statistics.median(durations):>10.1f}{max(durations):>10.1f}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ function normalizePath(path) {
   return path.startsWith("/") ? path : `/${path}`;
 }
 
-async function request(path, { method = "GET", headers: extraHeaders, body } = {}, token) {
+async function request(path, { method = "GET", headers: extraHeaders, body, withHeaders = false } = {}, token) {
   const url = `${BASE_URL}${normalizePath(path)}`;
   const headers = new Headers(extraHeaders || {});
 
@@ -51,11 +51,8 @@ async function request(path, { method = "GET", headers: extraHeaders, body } = {
     throw new Error(message);
   }
 
-  if (!text) {
-    return null;
-  }
-
-  return payload;
+  const data = text ? payload : null;
+  return withHeaders ? { data, headers: response.headers } : data;
 }
 
 function safeJsonParse(value) {
@@ -91,10 +88,31 @@ async function sendJson(path, data, token, method = "POST") {
   return request(path, { method, headers, body }, token);
 }
 
+// Live generation events of a project over a WebSocket; returns a function that closes it.
+function subscribeProgress(projectId, token, onEvent) {
+  const wsBase = BASE_URL.replace(/^http/, "ws");
+  const socket = new WebSocket(
+    `${wsBase}/projects/${projectId}/progress?token=${encodeURIComponent(token || "")}`
+  );
+
+  socket.onmessage = (message) => {
+    const event = safeJsonParse(message.data);
+    if (event && event.type !== "ping") {
+      onEvent(event);
+    }
+  };
+
+  return () => socket.close();
+}
+
 const api = {
   get(path, token) {
     return request(path, { method: "GET" }, token);
   },
+  // Like get(), but resolves to { data, headers } (e.g. for X-Next-Cursor pagination)
+  getPage(path, token) {
+    return request(path, { method: "GET", withHeaders: true }, token);
+  },
   postJSON(path, data, token) {
     return sendJson(path, data, token, "POST");
   },
@@ -105,6 +123,7 @@ const api = {
     return sendJson(path, data, token, "PATCH");
   },
   postForm,
+  subscribeProgress,
   delete(path, token) {
     return request(path, { method: "DELETE" }, token);
   },
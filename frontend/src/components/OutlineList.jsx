@@ -41,7 +41,14 @@ export default function OutlineList({
                     : "border-white/10 bg-white/5 text-gray-200 hover:bg-white/10"
                 }`}
               >
-                <p className="text-sm font-semibold">{item.title}</p>
+                <div className="flex items-center justify-between gap-2">
+                  <p className="text-sm font-semibold">{item.title}</p>
+                  {item.progress && (
+                    <span className="rounded-full bg-white/10 px-2 py-0.5 text-[10px] uppercase tracking-wide text-gray-300">
+                      {item.progress}
+                    </span>
+                  )}
+                </div>
                 <p className="text-xs text-gray-400">
                   {item.summary?.trim() ? item.summary : "Add summary details"}
                 </p>
@@ -6,6 +6,8 @@ export default function Dashboard() {
   const navigate = useNavigate();
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const token = localStorage.getItem("accessToken");
 
   useEffect(() => {
@@ -17,8 +19,11 @@ export default function Dashboard() {
           setProjects([]);
           return;
         }
-        const data = await api.get("/projects/my", token);
-        if (mounted) setProjects(data ?? []);
+        const { data, headers } = await api.getPage("/projects/my", token);
+        if (mounted) {
+          setProjects(data ?? []);
+          setNextCursor(headers.get("X-Next-Cursor"));
+        }
       } catch (err) {
         console.error("Failed to load projects", err);
       } finally {
@@ -32,6 +37,23 @@ export default function Dashboard() {
     };
   }, [token]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const { data, headers } = await api.getPage(
+        `/projects/my?cursor=${encodeURIComponent(nextCursor)}`,
+        token
+      );
+      setProjects((current) => [...current, ...(data ?? [])]);
+      setNextCursor(headers.get("X-Next-Cursor"));
+    } catch (err) {
+      console.error("Failed to load more projects", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <section className="mx-auto w-full max-w-6xl px-6 pt-32 pb-16">
       <header className="flex flex-col gap-4 md:flex-row md:items-center md:justify-between">
@@ -72,9 +94,27 @@ export default function Dashboard() {
             <p className="text-xs uppercase tracking-[0.25em] text-gray-500">{project.doc_type?.toUpperCase() ?? 'DOC'}</p>
             <h2 className="mt-2 text-lg font-semibold text-white">{project.title}</h2>
             <p className="mt-3 text-xs text-gray-400">Created {new Date(project.created_at).toLocaleString()}</p>
+            {project.section_count > 0 && (
+              <p className="mt-1 text-xs text-gray-400">
+                {(project.sections_by_status?.generated ?? 0) + (project.sections_by_status?.refined ?? 0)}/{project.section_count} sections drafted · updated{" "}
+                {new Date(project.last_modified).toLocaleString()}
+              </p>
+            )}
           </Link>
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="mt-6 flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="inline-flex items-center justify-center rounded-xl border border-white/10 px-4 py-2 text-sm font-semibold text-gray-200 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading…" : "Load more"}
+          </button>
+        </div>
+      )}
     </section>
   );
 }
@@ -26,11 +26,15 @@ const seedSections = [
   },
 ];
 
+const NODE_LABELS = { generate: "writing", evaluate: "reviewing", refine: "refining" };
+
 export default function Workspace() {
   const [sections, setSections] = useState(seedSections);
   const [activeId, setActiveId] = useState(seedSections[0]?.id ?? null);
   const [generatingSectionId, setGeneratingSectionId] = useState(null);
   const [projectTitle, setProjectTitle] = useState("");          // 🔹 NEW
+  const [generatingAll, setGeneratingAll] = useState(false);
+  const [sectionProgress, setSectionProgress] = useState({});   // section id -> label shown in the outline
   const { projectId } = useParams();
 
   // 🔹 Load persisted sections + project title when entering a saved project
@@ -279,6 +283,77 @@ export default function Workspace() {
     }
   };
 
+  // === GENERATE ALL (POST /projects/:id/generate, followed over the progress WebSocket) ===
+  const applyProgressEvent = (event) => {
+    const id = event.section_id != null ? String(event.section_id) : null;
+    switch (event.type) {
+      case "generation_started":
+        setSectionProgress(
+          Object.fromEntries((event.sections ?? []).map((s) => [String(s.section_id), "queued"]))
+        );
+        break;
+      case "node_entered":
+        setSectionProgress((cur) => ({ ...cur, [id]: NODE_LABELS[event.node] ?? event.node }));
+        break;
+      case "section_committed":
+        setSectionProgress((cur) => ({ ...cur, [id]: "done" }));
+        // replayed events of an earlier run carry an older version: keep the newer local text
+        setSections((cur) =>
+          cur.map((s) =>
+            String(s.id) === id && (!s.content || (event.version ?? 0) > (s.version ?? 0))
+              ? {
+                  ...s,
+                  content: event.content ?? "",
+                  version: event.version ?? s.version,
+                  lastFeedback: {
+                    sentiment: "generate",
+                    message: "Draft generated",
+                    at: new Date().toISOString(),
+                  },
+                }
+              : s
+          )
+        );
+        break;
+      case "section_failed":
+        setSectionProgress((cur) => ({ ...cur, [id]: "failed" }));
+        break;
+      default:
+        break;
+    }
+  };
+
+  const handleGenerateAll = async () => {
+    const token = localStorage.getItem("accessToken");
+    if (!token || !projectId) return;
+
+    setGeneratingAll(true);
+    // subscribe first: sections show up as they are committed, not when the request returns
+    const unsubscribe = api.subscribeProgress(projectId, token, applyProgressEvent);
+    try {
+      await api.postJSON(`/projects/${projectId}/generate`, {}, token);
+    } catch (err) {
+      console.error("Generate all failed", err);
+    } finally {
+      unsubscribe();
+      setGeneratingAll(false);
+    }
+
+    // the saved sections are authoritative once the run is over
+    try {
+      const data = await api.get(`/projects/${projectId}/sections`, token);
+      const byId = new Map((data || []).map((s) => [String(s.id), s]));
+      setSections((cur) =>
+        cur.map((s) => {
+          const saved = byId.get(String(s.id));
+          return saved ? { ...s, content: saved.content ?? "", version: saved.version ?? s.version } : s;
+        })
+      );
+    } catch (err) {
+      console.error("Failed to reload sections after generation", err);
+    }
+  };
+
   // === FEEDBACK (Looks good / Needs changes) ===
   const handleFeedback = async (sectionId, feedback) => {
     const token = localStorage.getItem("accessToken");
@@ -415,6 +490,16 @@ export default function Workspace() {
           </p>
         </div>
         <div className="flex gap-2">
+          {projectId && sections.length > 0 && sections.every((s) => s.persisted) && (
+            <button
+              type="button"
+              onClick={handleGenerateAll}
+              disabled={generatingAll}
+              className="self-start rounded-xl border border-white/10 px-4 py-2 text-sm font-semibold text-gray-200 transition hover:bg-white/10 disabled:opacity-50"
+            >
+              {generatingAll ? "Generating…" : "Generate all sections"}
+            </button>
+          )}
           <button
             type="button"
             onClick={handleExport}
@@ -431,6 +516,7 @@ export default function Workspace() {
             id: section.id,
             title: section.title,
             summary: section.summary,
+            progress: sectionProgress[String(section.id)],
           }))}
           activeId={activeId}
           onSelect={setActiveId}